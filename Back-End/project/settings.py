@@ -7,6 +7,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -67,7 +69,72 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # قاعدة اختبار على الديسك مش في الذاكرة: الـ in-memory المشتركة بين الـ threads
+        # بترمي "table is locked" بدل ما تستنى، واختبار الـ checkout المتزامن محتاجها
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+    }
+}
+
+# الكاش: Redis لو REDIS_URL موجود، وإلا كاش في الذاكرة (LocMem)
+# مهم: LocMem خاص بكل process، فأي deployment فيه أكتر من worker (gunicorn بيشغل
+# أكتر من واحد) لازم يضبط REDIS_URL، وإلا bump_version في worker مش بيوصل للباقيين
+# وبيرجعوا بيانات قديمة لحد ما الـ TTL يخلص. LocMem للتطوير والتيستات بس.
+# "product_detail" كاش منفصل لصفحات المنتجات: TTL + حد أقصى للعناصر (LRU)
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        },
+        "product_detail": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "KEY_PREFIX": "product-detail",
+            "TIMEOUT": 60 * 60,
+        },
     }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "smart-shop",
+            # الافتراضي 300 عنصر بس، ولما يتملى بيمسح مفاتيح الـ versions مع الصفحات
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        },
+        "product_detail": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "smart-shop-product-detail",
+            "TIMEOUT": 60 * 60,
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        },
+    }
+
+# Public catalog responses (seconds)
+CATALOG_CACHE = {
+    "TIMEOUT": 300,
+    "STALE_TIMEOUT": 60,
+    "LOCK_TIMEOUT": 10,
+}
+
+# Facet counts on the product search: price bucket edges and values per facet
+FACET_PRICE_BUCKETS = [0, 25, 50, 100, 250, 500, 1000]
+FACET_MAX_VALUES = 20
+
+# Typeahead: suggestions per kind, how many index keys one lookup may scan,
+# and the minimum seconds between two background reloads of the index
+SUGGEST = {
+    "LIMIT": 5,
+    "MAX_LIMIT": 20,
+    "MAX_SCAN": 5000,
+    "RELOAD_INTERVAL": 5,
+}
+
+# Top-products leaderboard: PRIOR_REVIEWS is the Bayesian prior weight,
+# GLOBAL_MEAN_TIMEOUT how long the store-wide mean rating is reused (seconds)
+LEADERBOARD = {
+    "SIZE": 5,
+    "PRIOR_REVIEWS": 10,
+    "GLOBAL_MEAN_TIMEOUT": 60 * 60,
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -102,6 +169,39 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Store pagination (cursor pages use these; ?page= keeps the old fixed size of 8)
+STORE_PAGE_SIZE = 8
+STORE_MAX_PAGE_SIZE = 100
+# Products per category on the shop view (?limit= overrides it)
+SHOP_VIEW_LIMIT = 8
+# Latest reviews embedded in a product payload (the rest via products/<pk>/reviews/)
+PRODUCT_EMBEDDED_REVIEWS = 5
+# Most items accepted by one bulk price / stock update
+BULK_UPDATE_MAX_ITEMS = 5000
+
+# Admin dashboard: chart windows in days (?days=), the default one, and how
+# many categories / vendors are ranked in the window
+DASHBOARD = {
+    "WINDOWS": (7, 30, 365),
+    "DEFAULT_WINDOW": 7,
+    "TOP": 5,
+}
+
+# Vendor analytics (seconds a computed window is reused; new orders and
+# reviews of the vendor's products invalidate it earlier)
+VENDOR_ANALYTICS = {
+    "TIMEOUT": 15 * 60,
+}
+
+# Idempotency-Key on order submission / payment (seconds): how long a stored
+# response is replayed, how long a duplicate waits for the original request,
+# and after how long an unfinished original is considered dead
+IDEMPOTENCY = {
+    "TTL": 24 * 60 * 60,
+    "WAIT_TIMEOUT": 10,
+    "LOCK_TIMEOUT": 60,
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -113,6 +213,7 @@ CORS_ALLOWED_ORIGINS = [
     "https://smart-shop00.netlify.app",
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -0,0 +1,121 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .cache import get_vendor_analytics
+from .models import OrderItem, Product
+from .rollups import window_start
+
+# ---------------------------------------------------------
+# Vendor analytics
+# ---------------------------------------------------------
+# Per product: revenue, units sold and return rate over the window, from one
+# grouped query over the vendor's OrderItem rows; a second grouped query by
+# day gives the revenue series and the totals. A cancelled order counts as a
+# return: it is left out of revenue and units and counted in the return rate.
+# Ratings come from the aggregates kept on Product (store/ratings.py).
+#
+# The result is cached per vendor and window; see get_vendor_analytics.
+
+CANCELLED = Q(order__status="Cancelled")
+LINE_TOTAL = ExpressionWrapper(
+    F("price") * F("qty"), output_field=DecimalField(max_digits=14, decimal_places=2)
+)
+SALES = {
+    "revenue": Sum(LINE_TOTAL, filter=~CANCELLED),
+    "units": Sum("qty", filter=~CANCELLED),
+    "orders": Count("order_id", distinct=True),
+    "returned": Count("order_id", distinct=True, filter=CANCELLED),
+}
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def _sales(vendor_id, start, group_by):
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    items = OrderItem.objects.filter(product__user_id=vendor_id, order__createdAt__gte=since)
+    if group_by == "day":
+        items = items.annotate(day=TruncDate("order__createdAt"))
+    rows = items.values(group_by).annotate(**SALES).order_by()
+    return {row.pop(group_by): row for row in rows}
+
+
+def _products(vendor_id, start):
+    sales = _sales(vendor_id, start, "product_id")
+    products = Product.objects.filter(user_id=vendor_id).only(
+        "id", "name", "image", "price", "countInStock", "rating", "numReviews", "ratingSum"
+    )
+    rows = []
+    for product in products:
+        row = sales.get(product.id, {})
+        rows.append(
+            {
+                "id": product.id,
+                "name": product.name,
+                "image": product.image.url if product.image else None,
+                "price": product.price,
+                "countInStock": product.countInStock,
+                "revenue": row.get("revenue") or Decimal(0),
+                "units": row.get("units") or 0,
+                "orders": row.get("orders", 0),
+                "returnRate": _rate(row.get("returned", 0), row.get("orders", 0)),
+                "rating": product.rating,
+                "numReviews": product.numReviews,
+                "ratingSum": product.ratingSum,
+            }
+        )
+    rows.sort(key=lambda row: (-row["revenue"], row["id"]))
+    return rows
+
+
+def _series(vendor_id, start, days):
+    sales = _sales(vendor_id, start, "day")
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = sales.get(day, {})
+        series.append(
+            {
+                "date": day.isoformat(),
+                "name": day.strftime("%d/%m"),
+                "revenue": row.get("revenue") or Decimal(0),
+                "units": row.get("units") or 0,
+                "orders": row.get("orders", 0),
+                "returned": row.get("returned", 0),
+            }
+        )
+    return series
+
+
+def _build(vendor_id, days):
+    start = window_start(days)
+    products = _products(vendor_id, start)
+    series = _series(vendor_id, start, days)
+
+    orders = sum(point["orders"] for point in series)
+    reviews = sum(product["numReviews"] for product in products)
+    rating_sum = sum(product.pop("ratingSum") for product in products)
+    return {
+        "days": days,
+        "summary": {
+            "revenue": sum(point["revenue"] for point in series),
+            "units": sum(point["units"] for point in series),
+            "orders": orders,
+            "returnRate": _rate(sum(point["returned"] for point in series), orders),
+            "rating": round(rating_sum / reviews, 2) if reviews else None,
+            "numReviews": reviews,
+        },
+        "products": products,
+        "revenueChart": series,
+    }
+
+
+def vendor_analytics(vendor_id, days):
+    # اليوم جزء من المفتاح: بعد نص الليل الفترة بتتحرك لوحدها
+    window = f"{days}:{timezone.localdate().isoformat()}"
+    return get_vendor_analytics(vendor_id, window, lambda: _build(vendor_id, days))
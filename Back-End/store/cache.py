@@ -0,0 +1,204 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from rest_framework.renderers import JSONRenderer
+
+# ---------------------------------------------------------
+# Versioned response cache for the public catalog endpoints
+# ---------------------------------------------------------
+# Any write to the catalog (products, reviews, categories, tags, images) bumps
+# one version number (see store/signals.py). A cached response is fresh only
+# while its version matches, so invalidation is a single cache write no matter
+# how many keys exist. Narrower counters ("categories", "tags") work the same.
+
+
+def _version_key(name):
+    return f"{name}:version"
+
+
+def get_version(name):
+    version = cache.get(_version_key(name))
+    if version is None:
+        # بنبدأ من الوقت الحالي عشان لو الكاش اتمسح منرجعش لرقم قديم
+        cache.add(_version_key(name), int(time.time() * 1000), None)
+        version = cache.get(_version_key(name))
+    return version
+
+
+def bump_version(name):
+    try:
+        return cache.incr(_version_key(name))
+    except ValueError:
+        get_version(name)
+        return cache.incr(_version_key(name))
+
+
+def get_catalog_version():
+    return get_version("catalog")
+
+
+def bump_catalog_version():
+    return bump_version("catalog")
+
+
+def _response_key(request, name):
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    raw = "|".join(
+        [name, request.path, repr(params), "staff" if request.user.is_staff else "public"]
+    )
+    return "catalog:response:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _to_response(entry):
+    return HttpResponse(
+        entry["content"], status=entry["status"], content_type="application/json"
+    )
+
+
+def cache_catalog_response(view):
+    """Cache a GET view's JSON response under the current catalog version.
+
+    - misses are coalesced: one request rebuilds, the others wait for it
+    - stale-while-revalidate: while someone rebuilds, the previous
+      response is served for up to CATALOG_CACHE["STALE_TIMEOUT"] seconds
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        options = settings.CATALOG_CACHE
+        key = _response_key(request, view.__name__)
+        version = get_catalog_version()
+
+        entry = cache.get(key)
+        if entry and entry["version"] == version and entry["fresh_until"] > time.time():
+            return _to_response(entry)
+
+        lock_key = key + ":lock"
+        if not cache.add(lock_key, 1, options["LOCK_TIMEOUT"]):
+            # في request تاني بيبني نفس الرد دلوقتي
+            if entry:
+                return _to_response(entry)
+            deadline = time.time() + options["LOCK_TIMEOUT"]
+            while time.time() < deadline:
+                time.sleep(0.05)
+                entry = cache.get(key)
+                if entry and entry["version"] == version:
+                    return _to_response(entry)
+            return view(request, *args, **kwargs)
+
+        try:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = {
+                "version": version,
+                "fresh_until": time.time() + options["TIMEOUT"],
+                "status": response.status_code,
+                "content": JSONRenderer().render(response.data),
+            }
+            cache.set(key, entry, options["TIMEOUT"] + options["STALE_TIMEOUT"])
+            return _to_response(entry)
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
+
+
+def cache_control_headers(**directives):
+    """Add Cache-Control to every response of a view, 304s included."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, **directives)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# ---------------------------------------------------------
+# Per-product detail cache
+# ---------------------------------------------------------
+# Read-through cache of the rendered getProduct payload in its own backend
+# (CACHES["product_detail"]: TTL and LRU size are configured there). Entries
+# are dropped by the signals whenever the product, its reviews, images or tags
+# change; each entry also remembers the product's updatedAt, so a build that
+# races with a write can never be served afterwards.
+
+PRODUCT_DETAIL_STATS = ("hits", "misses")
+
+
+def _product_detail_key(pk):
+    return f"product:detail:{pk}"
+
+
+def _count(stat):
+    key = f"product:detail:{stat}"
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+
+
+def get_product_detail(pk, updated_at, build):
+    backend = caches["product_detail"]
+    entry = backend.get(_product_detail_key(pk))
+    if entry is not None and entry["updatedAt"] == updated_at:
+        _count("hits")
+        return entry["content"]
+
+    _count("misses")
+    content = build()
+    backend.set(_product_detail_key(pk), {"updatedAt": updated_at, "content": content})
+    return content
+
+
+def invalidate_product_details(product_ids):
+    keys = [_product_detail_key(pk) for pk in product_ids]
+    if keys:
+        caches["product_detail"].delete_many(keys)
+
+
+def product_detail_stats():
+    stats = {stat: cache.get(f"product:detail:{stat}", 0) for stat in PRODUCT_DETAIL_STATS}
+    total = stats["hits"] + stats["misses"]
+    stats["hitRate"] = round(stats["hits"] / total, 4) if total else None
+    return stats
+
+
+# ---------------------------------------------------------
+# Per-vendor analytics cache
+# ---------------------------------------------------------
+# Each vendor has its own version counter, bumped when an order with their
+# products is placed, cancelled or removed or one of their products gets a
+# review. The version is part of the key, so a bump makes every cached window
+# stale at once.
+
+
+def bump_vendor_versions(vendor_ids):
+    for vendor_id in set(vendor_ids):
+        bump_version(f"vendor:{vendor_id}")
+
+
+def get_vendor_analytics(vendor_id, window, build):
+    version = get_version(f"vendor:{vendor_id}")
+    key = f"vendor:analytics:{vendor_id}:{version}:{window}"
+    content = cache.get(key)
+    if content is None:
+        content = build()
+        cache.set(key, content, settings.VENDOR_ANALYTICS["TIMEOUT"])
+    return content
@@ -0,0 +1,141 @@
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, F, Q, When
+
+from .cache import get_catalog_version
+from .models import Product
+
+# ---------------------------------------------------------
+# Product filters + facet counts (brand, category, tag, price)
+# ---------------------------------------------------------
+# Several values of one facet are OR-ed, different facets are AND-ed:
+#   ?brand=Apple,Sony&tag=wireless&price=0-25,25-50
+# Each facet is counted with every filter applied except its own, so the
+# storefront can show "Sony (12)" next to a checked "Apple".
+
+FACETS = ("category", "brand", "tag", "price")
+
+
+def _split(request, name):
+    raw = request.query_params.get(name) or ""
+    return sorted({value.strip() for value in raw.split(",") if value.strip()})
+
+
+def price_buckets():
+    # [0, 25, 50] => "0-25", "25-50", "50+"
+    edges = settings.FACET_PRICE_BUCKETS
+    buckets = []
+    for i, low in enumerate(edges):
+        high = edges[i + 1] if i + 1 < len(edges) else None
+        label = f"{low}-{high}" if high is not None else f"{low}+"
+        buckets.append((label, Decimal(low), Decimal(high) if high is not None else None))
+    return buckets
+
+
+def parse_filters(request):
+    labels = {label for label, _, _ in price_buckets()}
+    return {
+        "keyword": (request.query_params.get("keyword") or "").strip(),
+        "category": [c for c in _split(request, "category") if c.isdigit()],
+        "brand": _split(request, "brand"),
+        "tag": _split(request, "tag"),
+        "price": [p for p in _split(request, "price") if p in labels],
+    }
+
+
+def with_effective_price(queryset):
+    # السعر الفعلي: سعر الخصم لو موجود، زي الـ checkout
+    return queryset.annotate(
+        effective_price=Case(
+            When(discount_price__gt=0, then=F("discount_price")),
+            default=F("price"),
+        )
+    )
+
+
+def _price_q(labels):
+    condition = Q()
+    for label, low, high in price_buckets():
+        if label in labels:
+            bucket = Q(effective_price__gte=low)
+            if high is not None:
+                bucket &= Q(effective_price__lt=high)
+            condition |= bucket
+    return condition
+
+
+def apply_filters(queryset, filters, skip=None):
+    if filters["category"] and skip != "category":
+        queryset = queryset.filter(category_id__in=filters["category"])
+    if filters["brand"] and skip != "brand":
+        queryset = queryset.filter(brand__in=filters["brand"])
+    if filters["tag"] and skip != "tag":
+        tagged = Product.tags.through.objects.filter(tag__name__in=filters["tag"])
+        queryset = queryset.filter(id__in=tagged.values("product_id"))
+    if filters["price"] and skip != "price":
+        queryset = with_effective_price(queryset).filter(_price_q(filters["price"]))
+    return queryset
+
+
+def _counts(queryset, filters, facet):
+    # order_by() فاضية عشان الترتيب ميدخلش في الـ GROUP BY
+    queryset = apply_filters(queryset, filters, skip=facet).order_by()
+
+    if facet == "category":
+        rows = (
+            queryset.filter(category__isnull=False)
+            .values("category_id", "category__name")
+            .annotate(count=Count("id"))
+            .order_by("-count", "category__name")
+        )
+        return [
+            {
+                "value": row["category_id"],
+                "name": row["category__name"],
+                "count": row["count"],
+                "selected": str(row["category_id"]) in filters["category"],
+            }
+            for row in rows
+        ]
+
+    if facet == "price":
+        aggregates = {
+            label: Count("id", filter=_price_q([label])) for label, _, _ in price_buckets()
+        }
+        counts = with_effective_price(queryset).aggregate(**aggregates)
+        return [
+            {"value": label, "count": counts[label], "selected": label in filters["price"]}
+            for label, _, _ in price_buckets()
+        ]
+
+    if facet == "brand":
+        field = "brand"
+        queryset = queryset.exclude(brand__isnull=True).exclude(brand="")
+    else:
+        field = "tags__name"
+        queryset = queryset.filter(tags__isnull=False)
+    rows = (
+        queryset.values(field)
+        .annotate(count=Count("id", distinct=True))
+        .order_by("-count", field)[: settings.FACET_MAX_VALUES]
+    )
+    return [
+        {"value": row[field], "count": row["count"], "selected": row[field] in filters[facet]}
+        for row in rows
+    ]
+
+
+def get_facets(queryset, filters, staff=False):
+    """Facet counts for `queryset` (search + visibility, before facet filters)."""
+    raw = json.dumps([filters, staff, get_catalog_version()], sort_keys=True)
+    key = "catalog:facets:" + hashlib.md5(raw.encode()).hexdigest()
+
+    facets = cache.get(key)
+    if facets is None:
+        facets = {facet: _counts(queryset, filters, facet) for facet in FACETS}
+        cache.set(key, facets, settings.CATALOG_CACHE["TIMEOUT"])
+    return facets
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+# ---------------------------------------------------------
+# Idempotency-Key support for unsafe endpoints
+# ---------------------------------------------------------
+# The first request with a given (user, key) inserts a row; the unique
+# constraint makes that insert the lock, so concurrent duplicates are
+# serialized on the key. When the view finishes, its status and body are
+# stored on the row and every retry within IDEMPOTENCY["TTL"] gets that stored
+# response back without running the view again. Server errors are not
+# stored, so the client can retry them.
+#
+# `manage.py purge_idempotency_keys` deletes the expired rows.
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    raw = "|".join([request.method, request.path, body])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response, status=record.status)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _claim(request, key, fingerprint):
+    """Return (record, created); created=False means another request owns the key."""
+    options = settings.IDEMPOTENCY
+    now = timezone.now()
+    try:
+        # savepoint: لو إحنا جوه transaction، المفتاح المكرر ما يبوظهاش
+        with transaction.atomic():
+            return (
+                IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expiresAt=now + timedelta(seconds=options["TTL"]),
+                ),
+                True,
+            )
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+    if record is None:
+        return None, False
+    abandoned = record.status is None and record.createdAt < now - timedelta(
+        seconds=options["LOCK_TIMEOUT"]
+    )
+    if record.expiresAt < now or abandoned:
+        # مفتاح قديم أو طلب مات في النص: نمسحه ونحاول تاني
+        IdempotencyKey.objects.filter(pk=record.pk).delete()
+        return None, False
+    return record, False
+
+
+def idempotent(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} is too long"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = _fingerprint(request)
+        deadline = time.time() + settings.IDEMPOTENCY["WAIT_TIMEOUT"]
+        while True:
+            record, created = _claim(request, key, fingerprint)
+            if created:
+                break
+            if record is not None:
+                if record.fingerprint != fingerprint:
+                    return Response(
+                        {"detail": f"{HEADER} was already used for a different request"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                if record.status is not None:
+                    return _replay(record)
+            # الطلب الأصلي لسه شغال: نستنى نتيجته
+            if time.time() >= deadline:
+                return Response(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            time.sleep(0.05)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+            return response
+        record.status = response.status_code
+        record.response = response.data
+        record.save(update_fields=["status", "response"])
+        return response
+
+    return wrapper
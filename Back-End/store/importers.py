@@ -0,0 +1,196 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from . import leaderboard, search
+from .cache import bump_catalog_version
+from .models import Category, Product
+from .tags import clean_tag_names, resolve_tags
+
+# ---------------------------------------------------------
+# Streaming bulk product import (CSV / JSON Lines)
+# ---------------------------------------------------------
+# Rows are read one at a time and handled in batches: validate the batch,
+# resolve its categories and tags with one query each, bulk_create the
+# products and their tag links, then update the search index and the
+# leaderboard for the new ids (and, through resolve_tags, the "tags" version
+# when new tags were created). Memory stays bounded by the batch size.
+#
+# Columns: name, price, discount_price, brand, description, countInStock,
+#          category (name), tags ("a|b|c" in CSV, a list in JSON), image (path)
+
+FORMATS = ("csv", "jsonl")
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename, requested=None):
+    fmt = (requested or "").lower()
+    if not fmt:
+        fmt = "jsonl" if filename.lower().endswith((".jsonl", ".ndjson")) else "csv"
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported format '{fmt}', use csv or jsonl")
+    return fmt
+
+
+def iter_rows(binary_stream, fmt):
+    text = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row in csv.DictReader(text):
+            yield row
+        return
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield row if isinstance(row, dict) else {"__invalid__": True}
+
+
+# ----- row validation -----
+def _text(row, name, errors, max_length=None, required=False):
+    value = row.get(name)
+    value = str(value).strip() if value is not None else ""
+    if not value:
+        if required:
+            errors[name] = "This field is required."
+        return None
+    if max_length and len(value) > max_length:
+        errors[name] = f"Ensure this field has no more than {max_length} characters."
+    return value
+
+
+def _decimal(row, name, errors, required=False):
+    raw = row.get(name)
+    if raw is None or str(raw).strip() == "":
+        if required:
+            errors[name] = "This field is required."
+        return None
+    try:
+        value = Decimal(str(raw).strip())
+    except InvalidOperation:
+        errors[name] = "A valid number is required."
+        return None
+    if not value.is_finite() or value < 0 or value >= Decimal("1e8"):
+        errors[name] = "Must be between 0 and 99999999.99."
+        return None
+    return value.quantize(Decimal("0.01"))
+
+
+def _tags(row):
+    raw = row.get("tags")
+    if isinstance(raw, list):
+        names = raw
+    else:
+        names = str(raw or "").split("|")
+    return clean_tag_names(names)
+
+
+def clean_row(row):
+    """Return (data, errors) for one input row."""
+    if row.get("__invalid__"):
+        return None, {"row": "Each line must be a JSON object."}
+
+    errors = {}
+    data = {
+        "name": _text(row, "name", errors, max_length=200, required=True),
+        "brand": _text(row, "brand", errors, max_length=200),
+        "description": _text(row, "description", errors),
+        "price": _decimal(row, "price", errors, required=True),
+        "discount_price": _decimal(row, "discount_price", errors),
+        "category": _text(row, "category", errors),
+        "image": _text(row, "image", errors, max_length=100),
+        "tags": _tags(row),
+    }
+    stock = row.get("countInStock")
+    try:
+        data["countInStock"] = int(stock) if str(stock or "").strip() else 0
+        if data["countInStock"] < 0:
+            errors["countInStock"] = "Ensure this value is greater than or equal to 0."
+    except (TypeError, ValueError):
+        errors["countInStock"] = "A valid integer is required."
+    return data, errors
+
+
+# ----- batches -----
+def _import_batch(batch, user, approval_status, report):
+    category_names = {data["category"] for _, data in batch if data["category"]}
+    categories = dict(
+        Category.objects.filter(name__in=category_names).values_list("name", "id")
+    )
+
+    valid = []
+    for row_number, data in batch:
+        if data["category"] and data["category"] not in categories:
+            _report_error(report, row_number, {"category": "Unknown category."})
+        else:
+            valid.append((row_number, data))
+    if not valid:
+        return
+
+    with transaction.atomic():
+        tag_ids = resolve_tags(name for _, data in valid for name in data["tags"])
+        products = Product.objects.bulk_create(
+            [
+                Product(
+                    user=user,
+                    name=data["name"],
+                    brand=data["brand"],
+                    description=data["description"],
+                    price=data["price"],
+                    discount_price=data["discount_price"],
+                    countInStock=data["countInStock"],
+                    category_id=categories.get(data["category"]),
+                    image=data["image"] or None,
+                    approval_status=approval_status,
+                )
+                for _, data in valid
+            ]
+        )
+        Product.tags.through.objects.bulk_create(
+            [
+                Product.tags.through(product_id=product.id, tag_id=tag_ids[name])
+                for product, (_, data) in zip(products, valid)
+                for name in data["tags"]
+            ]
+        )
+        # bulk_create مش بيشغل الـ signals، فبنحدث الـ index والترتيب بنفسنا
+        search.index_products([product.id for product in products])
+        if approval_status == "approved":
+            leaderboard.update_products(products)
+    report["created"] += len(products)
+
+
+def _report_error(report, row_number, errors):
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": row_number, "errors": errors})
+
+
+def import_products(rows, user, approval_status="pending", batch_size=500):
+    report = {"created": 0, "failed": 0, "errors": []}
+    batch = []
+    for row_number, row in enumerate(rows, start=1):
+        data, errors = clean_row(row)
+        if errors:
+            _report_error(report, row_number, errors)
+            continue
+        batch.append((row_number, data))
+        if len(batch) >= batch_size:
+            _import_batch(batch, user, approval_status, report)
+            batch = []
+    if batch:
+        _import_batch(batch, user, approval_status, report)
+
+    if report["created"]:
+        bump_catalog_version()
+    return report
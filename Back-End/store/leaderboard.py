@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg
+
+from .models import Product, ProductRanking, Review
+
+# ---------------------------------------------------------
+# Top-products leaderboard (Bayesian weighted rating)
+# ---------------------------------------------------------
+# score = (v * R + m * C) / (v + m)
+#   v = numReviews, R = product rating, C = mean rating over all reviews,
+#   m = LEADERBOARD["PRIOR_REVIEWS"] (how many reviews a product needs before
+#       its own rating outweighs the store average)
+# So one 5-star review no longer beats 500 reviews at 4.9.
+
+GLOBAL_MEAN_KEY = "leaderboard:global-mean"
+
+
+def global_mean():
+    mean = cache.get(GLOBAL_MEAN_KEY)
+    if mean is None:
+        mean = float(Review.objects.aggregate(avg=Avg("rating"))["avg"] or 0)
+        cache.set(GLOBAL_MEAN_KEY, mean, settings.LEADERBOARD["GLOBAL_MEAN_TIMEOUT"])
+    return mean
+
+
+def weighted_score(rating, num_reviews, mean):
+    prior = settings.LEADERBOARD["PRIOR_REVIEWS"]
+    if num_reviews + prior == 0:
+        return float(rating)
+    return (num_reviews * float(rating) + prior * mean) / (num_reviews + prior)
+
+
+def update_product(product):
+    # بيتنادى مع كل حفظ للمنتج: المنتج غير الموافق عليه بيخرج من الترتيب
+    if product.approval_status != "approved":
+        ProductRanking.objects.filter(product_id=product.pk).delete()
+        return
+    ProductRanking.objects.update_or_create(
+        product_id=product.pk,
+        defaults={
+            "category_id": product.category_id,
+            "score": weighted_score(product.rating, product.numReviews, global_mean()),
+        },
+    )
+
+
+def update_products(products):
+    # نفس update_product لمجموعة منتجات مرة واحدة (الـ bulk writes مش بتشغل signals)
+    mean = global_mean()
+    with transaction.atomic():
+        ProductRanking.objects.filter(product_id__in=[p.pk for p in products]).delete()
+        ProductRanking.objects.bulk_create(
+            [
+                ProductRanking(
+                    product_id=product.pk,
+                    category_id=product.category_id,
+                    score=weighted_score(product.rating, product.numReviews, mean),
+                )
+                for product in products
+                if product.approval_status == "approved"
+            ]
+        )
+
+
+def refresh_all(batch_size=1000):
+    cache.delete(GLOBAL_MEAN_KEY)
+    mean = global_mean()
+    products = Product.objects.filter(approval_status="approved").values_list(
+        "id", "category_id", "rating", "numReviews"
+    )
+
+    total = 0
+    with transaction.atomic():
+        ProductRanking.objects.all().delete()
+        batch = []
+        for product_id, category_id, rating, num_reviews in products.iterator(
+            chunk_size=batch_size
+        ):
+            batch.append(
+                ProductRanking(
+                    product_id=product_id,
+                    category_id=category_id,
+                    score=weighted_score(rating, num_reviews, mean),
+                )
+            )
+            if len(batch) >= batch_size:
+                ProductRanking.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        ProductRanking.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def top_product_ids(limit, category_id=None):
+    # بيقرا أول N صف من الـ index على طول، من غير ما يرتب جدول المنتجات
+    rankings = ProductRanking.objects.order_by("-score", "product")
+    if category_id:
+        rankings = rankings.filter(category_id=category_id)
+    return list(rankings.values_list("product_id", flat=True)[:limit])
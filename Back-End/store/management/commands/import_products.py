@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from store import importers
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = "Bulk-import products from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Username of the owning vendor")
+        parser.add_argument("--format", choices=importers.FORMATS)
+        parser.add_argument(
+            "--approval-status",
+            default="pending",
+            choices=[value for value, _ in Product.APPROVAL_CHOICES],
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+
+        try:
+            fmt = importers.detect_format(options["path"], options["format"])
+        except importers.ImportFormatError as e:
+            raise CommandError(str(e))
+
+        with open(options["path"], "rb") as stream:
+            report = importers.import_products(
+                importers.iter_rows(stream, fmt),
+                user,
+                approval_status=options["approval_status"],
+                batch_size=options["batch_size"],
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {report['created']} products, {report['failed']} failed")
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollups (per day, category and vendor) from the orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        days = rollups.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the sales rollups for {days} days"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store import ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild every product's rating, review count and star histogram from its reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = ratings.reconcile(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Fixed the rating aggregates of {fixed} products"))
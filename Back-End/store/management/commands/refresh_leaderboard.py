@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recompute the top-products leaderboard (and the store-wide mean rating)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = leaderboard.refresh_all(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Ranked {total} products"))
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+FTS_TABLE = "store_product_fts"
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            name, brand, category, tags, description,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        """
+    )
+    schema_editor.execute(
+        f"""
+        INSERT INTO {FTS_TABLE} (rowid, name, brand, category, tags, description)
+        SELECT
+            p.id,
+            p.name,
+            COALESCE(p.brand, ''),
+            COALESCE(c.name, ''),
+            COALESCE((
+                SELECT group_concat(t.name, ' ')
+                FROM store_product_tags pt
+                JOIN store_tag t ON t.id = pt.tag_id
+                WHERE pt.product_id = p.id
+            ), ''),
+            COALESCE(p.description, '')
+        FROM store_product p
+        LEFT JOIN store_category c ON c.id = p.category_id
+        """
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0003_cartitem_wishlistitem"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 6.0 on 2026-10-18 16:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Same defaults as settings.LEADERBOARD; `manage.py refresh_leaderboard` redoes this
+PRIOR_REVIEWS = 10
+
+
+def populate_rankings(apps, schema_editor):
+    Product = apps.get_model("store", "Product")
+    Review = apps.get_model("store", "Review")
+    ProductRanking = apps.get_model("store", "ProductRanking")
+
+    mean = Review.objects.aggregate(avg=models.Avg("rating"))["avg"] or 0
+    rankings = [
+        ProductRanking(
+            product_id=product_id,
+            category_id=category_id,
+            score=(num_reviews * float(rating) + PRIOR_REVIEWS * mean)
+            / (num_reviews + PRIOR_REVIEWS),
+        )
+        for product_id, category_id, rating, num_reviews in Product.objects.filter(
+            approval_status="approved"
+        ).values_list("id", "category_id", "rating", "numReviews")
+    ]
+    ProductRanking.objects.bulk_create(rankings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0004_product_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductRanking",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="ranking",
+                        serialize=False,
+                        to="store.product",
+                    ),
+                ),
+                ("score", models.FloatField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="store.category",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-score", "product"], name="ranking_score_idx"
+                    ),
+                    models.Index(
+                        fields=["category", "-score", "product"],
+                        name="ranking_category_score_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-18 16:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_items(apps, schema_editor):
+    # قبل الـ unique constraint: نسيب أحدث صف لكل (user, product)
+    for model_name in ("CartItem", "WishlistItem"):
+        model = apps.get_model("store", model_name)
+        duplicates = (
+            model.objects.values("user_id", "product_id")
+            .annotate(keep=Max("id"), rows=models.Count("id"))
+            .filter(rows__gt=1)
+        )
+        for row in duplicates:
+            model.objects.filter(
+                user_id=row["user_id"], product_id=row["product_id"]
+            ).exclude(id=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0005_productranking"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "createdAt"], name="order_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["approval_status", "createdAt", "id"],
+                name="product_approved_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "approval_status", "createdAt", "id"],
+                name="product_category_created_idx",
+            ),
+        ),
+        migrations.RunPython(remove_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(
+                fields=("user", "product"), name="unique_cart_item"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="wishlistitem",
+            constraint=models.UniqueConstraint(
+                fields=("user", "product"), name="unique_wishlist_item"
+            ),
+        ),
+    ]
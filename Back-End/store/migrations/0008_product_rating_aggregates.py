@@ -0,0 +1,77 @@
+# Generated by Django 6.0 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+def populate_aggregates(apps, schema_editor):
+    # نفس اللي بيعمله `manage.py reconcile_ratings`
+    Product = apps.get_model("store", "Product")
+    Review = apps.get_model("store", "Review")
+
+    rows = (
+        Review.objects.order_by()
+        .values("product_id")
+        .annotate(
+            count=models.Count("id"),
+            total=models.Sum("rating"),
+            **{
+                f"stars{s}": models.Count("id", filter=models.Q(rating=s))
+                for s in range(1, 6)
+            },
+        )
+    )
+    products = []
+    for row in rows:
+        product = Product(id=row["product_id"])
+        product.numReviews = row["count"]
+        product.ratingSum = row["total"]
+        product.rating = round(row["total"] / row["count"], 2)
+        for s in range(1, 6):
+            setattr(product, f"stars{s}", row[f"stars{s}"])
+        products.append(product)
+    Product.objects.bulk_update(
+        products,
+        ["numReviews", "ratingSum", "rating"] + [f"stars{s}" for s in range(1, 6)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0007_product_updatedat"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="ratingSum",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="stars1",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="stars2",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="stars3",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="stars4",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="stars5",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,198 @@
+# Generated by Django 6.0 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def populate_rollups(apps, schema_editor):
+    # نفس اللي بيعمله `manage.py rebuild_sales_rollups`
+    Order = apps.get_model("store", "Order")
+    OrderItem = apps.get_model("store", "OrderItem")
+    DailySales = apps.get_model("store", "DailySales")
+    DailyCategorySales = apps.get_model("store", "DailyCategorySales")
+    DailyVendorSales = apps.get_model("store", "DailyVendorSales")
+    paid = models.Q(isPaid=True)
+    line_total = models.Sum(
+        models.F("price") * models.F("qty"),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+    )
+
+    items = dict(
+        OrderItem.objects.exclude(order__status="Cancelled")
+        .annotate(day=TruncDate("order__createdAt"))
+        .values("day")
+        .annotate(items=models.Sum("qty"))
+        .order_by()
+        .values_list("day", "items")
+    )
+    days = (
+        Order.objects.exclude(status="Cancelled")
+        .annotate(day=TruncDate("createdAt"))
+        .values("day")
+        .annotate(
+            orders=models.Count("id"),
+            sales=models.Sum("totalPrice"),
+            paidOrders=models.Count("id", filter=paid),
+            paidSales=models.Sum("totalPrice", filter=paid),
+        )
+        .order_by()
+    )
+    DailySales.objects.bulk_create(
+        [
+            DailySales(
+                day=row["day"],
+                orders=row["orders"],
+                sales=row["sales"] or 0,
+                items=items.get(row["day"]) or 0,
+                paidOrders=row["paidOrders"],
+                paidSales=row["paidSales"] or 0,
+            )
+            for row in days
+        ],
+        batch_size=1000,
+    )
+
+    for model, source, target in (
+        (DailyCategorySales, "category_id", "category_id"),
+        (DailyVendorSales, "user_id", "vendor_id"),
+    ):
+        rows = (
+            OrderItem.objects.filter(**{f"product__{source}__isnull": False})
+            .exclude(order__status="Cancelled")
+            .annotate(day=TruncDate("order__createdAt"))
+            .values("day", f"product__{source}")
+            .annotate(
+                orders=models.Count("order_id", distinct=True),
+                items=models.Sum("qty"),
+                sales=line_total,
+            )
+            .order_by()
+        )
+        model.objects.bulk_create(
+            [
+                model(
+                    day=row["day"],
+                    orders=row["orders"],
+                    items=row["items"],
+                    sales=row["sales"],
+                    **{target: row[f"product__{source}"]},
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0011_order_list_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(unique=True)),
+                ("orders", models.IntegerField(default=0)),
+                (
+                    "sales",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("items", models.IntegerField(default=0)),
+                ("paidOrders", models.IntegerField(default=0)),
+                (
+                    "paidSales",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyCategorySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("orders", models.IntegerField(default=0)),
+                (
+                    "sales",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("items", models.IntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="store.category",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "category"), name="unique_daily_category_sales"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyVendorSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("orders", models.IntegerField(default=0)),
+                (
+                    "sales",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("items", models.IntegerField(default=0)),
+                (
+                    "vendor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["vendor", "day"], name="vendor_sales_day_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "vendor"), name="unique_daily_vendor_sales"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 19:10
+
+from django.db import migrations
+
+
+def sync_delivered_status(apps, schema_editor):
+    # الطلبات القديمة اتعلمت isDelivered من غير ما الحالة تتغير
+    Order = apps.get_model("store", "Order")
+    Order.objects.filter(isDelivered=True).exclude(status="Delivered").update(
+        status="Delivered"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0012_sales_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(sync_delivered_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def snapshot_category_vendor(apps, schema_editor):
+    # الطلبات القديمة ملهاش نسخة: أقرب حاجة هي القسم والبائع الحاليين للمنتج
+    OrderItem = apps.get_model("store", "OrderItem")
+    Product = apps.get_model("store", "Product")
+    product = Product.objects.filter(id=models.OuterRef("product_id"))
+    OrderItem.objects.filter(product__isnull=False).update(
+        category_id=models.Subquery(product.values("category_id")[:1]),
+        vendor_id=models.Subquery(product.values("user_id")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0013_sync_delivered_status"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="category",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="store.category",
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="vendor",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(snapshot_category_vendor, migrations.RunPython.noop),
+    ]
@@ -37,14 +37,46 @@ class Product(models.Model):
     
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     numReviews = models.IntegerField(default=0)
+    # مجموع التقييمات وعددها لكل نجمة: بتتحدث مع كل review (store/ratings.py)
+    ratingSum = models.IntegerField(default=0)
+    stars1 = models.IntegerField(default=0)
+    stars2 = models.IntegerField(default=0)
+    stars3 = models.IntegerField(default=0)
+    stars4 = models.IntegerField(default=0)
+    stars5 = models.IntegerField(default=0)
     isFeatured = models.BooleanField(default=False) 
     
     approval_status = models.CharField(max_length=20, choices=APPROVAL_CHOICES, default='pending') 
     
     createdAt = models.DateTimeField(auto_now_add=True) 
+    # بيتحدث مع أي تغيير في المنتج أو الريفيوهات أو الصور أو التاجز (للـ ETag)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # القوائم العامة: approval_status = 'approved' ORDER BY createdAt DESC, id DESC
+            models.Index(fields=['approval_status', 'createdAt', 'id'], name='product_approved_created_idx'),
+            # صفحة القسم: category + approval_status بنفس الترتيب
+            models.Index(fields=['category', 'approval_status', 'createdAt', 'id'], name='product_category_created_idx'),
+        ]
 
     def __str__(self): return self.name
 
+# ----------------- ترتيب أفضل المنتجات (Leaderboard) -----------------
+# جدول محسوب مسبقاً: صف لكل منتج موافق عليه بالـ score الموزون بتاعه
+class ProductRanking(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='ranking')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', 'product'], name='ranking_score_idx'),
+            models.Index(fields=['category', '-score', 'product'], name='ranking_category_score_idx'),
+        ]
+
+    def __str__(self): return f"{self.product_id}: {self.score:.3f}"
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='product_gallery/')
@@ -58,6 +90,13 @@ class Review(models.Model):
     comment = models.TextField(null=True, blank=True)
     createdAt = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # products/<pk>/reviews/: الأحدث، أو حسب النجوم (مع فلتر النجوم)
+            models.Index(fields=['product', 'createdAt', 'id'], name='review_product_created_idx'),
+            models.Index(fields=['product', 'rating', 'createdAt', 'id'], name='review_product_rating_idx'),
+        ]
+
     def __str__(self): return str(self.rating)
 
 # ----------------- الطلبات -----------------
@@ -85,6 +124,18 @@ class Order(models.Model):
     deliveredAt = models.DateTimeField(null=True, blank=True)
     createdAt = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # طلباتي: user = ? ORDER BY createdAt DESC
+            models.Index(fields=['user', 'createdAt'], name='order_user_created_idx'),
+            # قائمة الطلبات في الداشبورد: الفلاتر + الترتيب
+            models.Index(fields=['createdAt', 'id'], name='order_created_idx'),
+            models.Index(fields=['status', 'createdAt', 'id'], name='order_status_created_idx'),
+            models.Index(fields=['isPaid', 'createdAt', 'id'], name='order_paid_created_idx'),
+            models.Index(fields=['isDelivered', 'createdAt', 'id'], name='order_delivered_created_idx'),
+            models.Index(fields=['totalPrice', 'id'], name='order_total_idx'),
+        ]
+
     def __str__(self): return f"Order {self.id}"
 
 class OrderItem(models.Model):
@@ -94,6 +145,9 @@ class OrderItem(models.Model):
     qty = models.IntegerField(default=1) 
     price = models.DecimalField(max_digits=10, decimal_places=2) 
     image = models.CharField(max_length=200, null=True, blank=True) 
+    # القسم والبائع وقت الطلب: الإحصائيات بتتحسب منهم حتى لو المنتج اتنقل بعدين
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    vendor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     
     def __str__(self): return str(self.name)
 
@@ -116,6 +170,11 @@ class CartItem(models.Model):
     qty = models.IntegerField(default=1)
     createdAt = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_cart_item'),
+        ]
+
     def __str__(self):
         return f"{self.qty} x {self.product.name}"
 
@@ -125,5 +184,82 @@ class WishlistItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     createdAt = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_wishlist_item'),
+        ]
+
+    def __str__(self):
+        return self.product.name
+
+
+# ----------------- إحصائيات المبيعات اليومية (Rollups) -----------------
+# صف لكل يوم (ولكل قسم / بائع في اليوم) بيتحدث مع كل طلب (store/rollups.py)
+# فالداشبورد بيقرا عدد أيام بدل ما يعدي على كل الطلبات
+class DailySales(models.Model):
+    day = models.DateField(unique=True)
+    orders = models.IntegerField(default=0)
+    sales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    items = models.IntegerField(default=0)
+    paidOrders = models.IntegerField(default=0)
+    paidSales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self): return f"{self.day}: {self.sales}"
+
+
+class DailyCategorySales(models.Model):
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    orders = models.IntegerField(default=0)
+    sales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    items = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='unique_daily_category_sales'),
+        ]
+
+    def __str__(self): return f"{self.day} / {self.category_id}: {self.sales}"
+
+
+class DailyVendorSales(models.Model):
+    day = models.DateField()
+    vendor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    orders = models.IntegerField(default=0)
+    sales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    items = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'vendor'], name='unique_daily_vendor_sales'),
+        ]
+        indexes = [
+            # إحصائيات البائع: vendor = ? AND day >= ?
+            models.Index(fields=['vendor', 'day'], name='vendor_sales_day_idx'),
+        ]
+
+    def __str__(self): return f"{self.day} / {self.vendor_id}: {self.sales}"
+
+
+# 👇 مفاتيح الـ Idempotency: الموبايل بيعيد الطلب بعد timeout، فبنرجع نفس الرد المتخزن
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # sha256 للـ method + path + body: نفس المفتاح مع طلب مختلف بيترفض
+    fingerprint = models.CharField(max_length=64)
+    # None = الطلب الأصلي لسه شغال
+    status = models.IntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    createdAt = models.DateTimeField(auto_now_add=True)
+    expiresAt = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expiresAt'], name='idempotency_expires_idx'),
+        ]
+
     def __str__(self):
-        return self.product.name
\ No newline at end of file
+        return f"{self.user_id}: {self.key}"
@@ -0,0 +1,161 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import rollups
+from .cache import bump_catalog_version, invalidate_product_details
+from .models import Order, OrderItem, Product
+from .suggest import suggestions
+
+# ---------------------------------------------------------
+# Order list filters (admin list, export, seller orders)
+# ---------------------------------------------------------
+# ?status=Pending,Shipped&isPaid=true&isDelivered=false&user=5
+# &date_from=2026-01-01&date_to=2026-01-31
+#
+# Dates become datetime bounds on createdAt (not DATE(createdAt)) so the
+# (…, createdAt, id) indexes on Order stay usable. Invalid values raise
+# ValueError with a message meant for the client.
+
+
+def parse_bool(value):
+    return {"true": True, "1": True, "false": False, "0": False}.get((value or "").lower())
+
+
+def parse_day_start(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, "%Y-%m-%d")) if value else None
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', use YYYY-MM-DD")
+
+
+def filter_orders(queryset, params, prefix=""):
+    """Apply the order filters in params; prefix="order__" for an OrderItem queryset."""
+    filters = {}
+    statuses = [s for s in (params.get("status") or "").split(",") if s]
+    if statuses:
+        filters["status__in"] = statuses
+    for field in ("isPaid", "isDelivered"):
+        value = parse_bool(params.get(field))
+        if value is not None:
+            filters[field] = value
+    if (params.get("user") or "").isdigit():
+        filters["user_id"] = params["user"]
+    date_from = parse_day_start(params.get("date_from"))
+    date_to = parse_day_start(params.get("date_to"))
+    if date_from:
+        filters["createdAt__gte"] = date_from
+    if date_to:
+        filters["createdAt__lt"] = date_to + timedelta(days=1)
+    return queryset.filter(**{prefix + key: value for key, value in filters.items()})
+
+
+# ---------------------------------------------------------
+# Order status transitions
+# ---------------------------------------------------------
+# Target status -> the statuses an order may move to it from. Delivered and
+# Cancelled are final. isDelivered / deliveredAt change in the same UPDATE as
+# the status, so the flags and Order.status can't drift apart.
+#
+# Every UPDATE is guarded by the allowed source statuses and its row count is
+# checked: an order another request moved in the meantime is reported as a
+# conflict, not as updated (select_for_update is a no-op on SQLite).
+# Cancelling puts the stock back and takes the order out of the sales rollups
+# in the same transaction.
+
+TRANSITIONS = {
+    "Processing": ("Pending",),
+    "Shipped": ("Pending", "Processing"),
+    "Delivered": ("Pending", "Processing", "Shipped"),
+    "Cancelled": ("Pending", "Processing"),
+}
+
+
+def _synced_fields(target, now):
+    if target == "Delivered":
+        return {"isDelivered": True, "deliveredAt": now}
+    return {}
+
+
+def _move(queryset, target, now):
+    return queryset.filter(status__in=TRANSITIONS[target]).update(
+        status=target, **_synced_fields(target, now)
+    )
+
+
+def _cancelled(order_ids, now):
+    """Restock the lines of freshly cancelled orders and take them out of the rollups."""
+    for order in Order.objects.filter(id__in=order_ids).only(
+        "id", "createdAt", "totalPrice", "isPaid", "status"
+    ):
+        rollups.order_cancelled(order)
+
+    # بالترتيب حسب الـ id زي الـ checkout، عشان الاتنين يقفلوا الصفوف بنفس الترتيب
+    lines = (
+        OrderItem.objects.filter(order_id__in=order_ids, product__isnull=False)
+        .values("product_id")
+        .annotate(qty=Sum("qty"))
+        .order_by("product_id")
+    )
+    product_ids = []
+    for line in lines:
+        Product.objects.filter(id=line["product_id"]).update(
+            countInStock=F("countInStock") + line["qty"], updatedAt=now
+        )
+        product_ids.append(line["product_id"])
+
+    def invalidate():
+        invalidate_product_details(product_ids)
+        bump_catalog_version()
+        suggestions.catalog_changed()
+
+    transaction.on_commit(invalidate)
+
+
+def apply_transitions(changes):
+    """Move orders to new statuses; changes is {order_id: target status}.
+
+    Returns {order_id: (outcome, previous status)} where outcome is one of
+    updated, unchanged, invalid_transition, conflict or not_found.
+    """
+    now = timezone.now()
+    outcomes = {}
+    by_target = defaultdict(list)
+    with transaction.atomic():
+        current = dict(
+            Order.objects.select_for_update()
+            .filter(id__in=list(changes))
+            .values_list("id", "status")
+        )
+        for order_id, target in changes.items():
+            previous = current.get(order_id)
+            if previous is None:
+                outcomes[order_id] = ("not_found", None)
+            elif previous == target:
+                outcomes[order_id] = ("unchanged", previous)
+            elif previous not in TRANSITIONS.get(target, ()):
+                outcomes[order_id] = ("invalid_transition", previous)
+            else:
+                outcomes[order_id] = ("updated", previous)
+                by_target[target].append(order_id)
+
+        for target, order_ids in by_target.items():
+            if target == "Cancelled":
+                # UPDATE لكل طلب: لازم نعرف بالظبط مين اتلغى عشان نرجع مخزونه مرة واحدة
+                moved = [i for i in order_ids if _move(Order.objects.filter(id=i), target, now)]
+                if moved:
+                    _cancelled(moved, now)
+            else:
+                # UPDATE واحد لكل حالة: WHERE id IN (...) AND status IN (المسموح)
+                moved = order_ids
+                if _move(Order.objects.filter(id__in=order_ids), target, now) != len(order_ids):
+                    # طلب تاني غير حالة بعضهم في النص: اللي مش على الحالة الجديدة ما اتحدثش
+                    moved = Order.objects.filter(id__in=order_ids, status=target).values_list(
+                        "id", flat=True
+                    )
+            for order_id in set(order_ids).difference(moved):
+                outcomes[order_id] = ("conflict", outcomes[order_id][1])
+    return outcomes
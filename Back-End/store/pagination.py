@@ -0,0 +1,122 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# ---------------------------------------------------------
+# Keyset (cursor) pagination
+# ---------------------------------------------------------
+# The cursor is an opaque base64 token holding the ordering values of the
+# last (or first) row of the current page. Pages are fetched with a WHERE on
+# those values, so there is no COUNT(*) and no OFFSET however deep you go.
+# The last ordering field must be unique (normally "id") and none of the
+# ordering fields may be NULL. Annotations (e.g. search_rank) can be ordered
+# on too, as long as they have an output_field.
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({"v": values, "d": direction}, default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload["v"], payload["d"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor")
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        raise InvalidCursor("Invalid cursor")
+    return values, direction
+
+
+def get_page_size(request, default=None, param="page_size"):
+    default = default or settings.STORE_PAGE_SIZE
+    try:
+        size = int(request.query_params.get(param, default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, settings.STORE_MAX_PAGE_SIZE))
+
+
+def _parse_ordering(ordering):
+    return [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+
+
+def _field(queryset, name):
+    # الترتيب ممكن يكون على annotation (زي search_rank) مش عمود في الموديل
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    return queryset.model._meta.get_field(name)
+
+
+def _keyset_filter(fields, values, forward):
+    # (a, b) after (x, y)  ==>  a > x OR (a = x AND b > y)   (flipped for "-a")
+    condition = Q()
+    for i in range(len(fields) - 1, -1, -1):
+        name, descending = fields[i]
+        lookup = "lt" if descending == forward else "gt"
+        step = Q(**{f"{name}__{lookup}": values[i]})
+        if i < len(fields) - 1:
+            step |= Q(**{name: values[i]}) & condition
+        condition = step
+    return condition
+
+
+def _link(request, cursor):
+    params = request.query_params.copy()
+    params["cursor"] = cursor
+    params.pop("page", None)
+    return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
+def paginate_by_cursor(request, queryset, ordering=("-createdAt", "-id"), page_size=None):
+    """Return (rows, next_url, previous_url) for one keyset page."""
+    fields = _parse_ordering(ordering)
+    page_size = get_page_size(request, page_size)
+
+    cursor = request.query_params.get("cursor")
+    direction = "next"
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise InvalidCursor("Invalid cursor")
+        try:
+            values = [
+                _field(queryset, name).to_python(value) for (name, _), value in zip(fields, values)
+            ]
+        except ValidationError:
+            raise InvalidCursor("Invalid cursor")
+        forward = direction == "next"
+        queryset = queryset.filter(_keyset_filter(fields, values, forward))
+
+    if direction == "prev":
+        # بنمشي بالعكس وبعدين نقلب الصفحة عشان الترتيب يفضل ثابت
+        reverse = [f[1:] if f.startswith("-") else f"-{f}" for f in ordering]
+        rows = list(queryset.order_by(*reverse)[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next, has_prev = True, has_more
+    else:
+        rows = list(queryset.order_by(*ordering)[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        has_next, has_prev = has_more, bool(cursor)
+
+    def values_of(row):
+        return [getattr(row, name) for name, _ in fields]
+
+    next_url = prev_url = None
+    if rows and has_next:
+        next_url = _link(request, encode_cursor(values_of(rows[-1]), "next"))
+    if rows and has_prev:
+        prev_url = _link(request, encode_cursor(values_of(rows[0]), "prev"))
+    return rows, next_url, prev_url
@@ -0,0 +1,136 @@
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from . import leaderboard
+from .cache import bump_catalog_version, bump_vendor_versions, invalidate_product_details
+from .models import Product, Review
+from .suggest import suggestions
+
+# ---------------------------------------------------------
+# Running rating aggregates on Product
+# ---------------------------------------------------------
+# Product keeps numReviews, ratingSum and one counter per star (stars1..stars5).
+# A review write changes them with F() expressions in a single UPDATE inside
+# the review's transaction, so the cost no longer depends on how many reviews
+# the product has and concurrent reviews can't overwrite each other's totals.
+# rating (the average) is recomputed from the new sum/count in the same UPDATE.
+# The leaderboard, the caches and the typeahead index are refreshed on commit.
+# A rating outside 1..5 (legacy rows) still counts in numReviews / ratingSum
+# but has no star counter.
+#
+# The review views call review_added / review_changed; deletes (admin, shell)
+# reach review_removed through the Review post_delete signal. `manage.py
+# reconcile_ratings` rebuilds everything from Review.
+
+STARS = range(1, 6)
+AGGREGATE_FIELDS = ["numReviews", "ratingSum", "rating"] + [f"stars{s}" for s in STARS]
+
+
+def _apply(product_id, old_rating=None, new_rating=None):
+    count = (new_rating is not None) - (old_rating is not None)
+    total = (new_rating or 0) - (old_rating or 0)
+
+    updates = {
+        "numReviews": F("numReviews") + count,
+        "ratingSum": F("ratingSum") + total,
+        # الـ SET بيشوف القيم القديمة، فبنحسب المتوسط من القديم + التغيير
+        "rating": Case(
+            When(numReviews=-count, then=Value(0.0)),
+            default=Cast(F("ratingSum") + total, FloatField()) / (F("numReviews") + count),
+            output_field=FloatField(),
+        ),
+        "updatedAt": timezone.now(),
+    }
+    if old_rating != new_rating:
+        # ريفيو قديم بتقييم برا 1..5 (0 مثلاً) مالوش عداد نجوم
+        if old_rating in STARS:
+            updates[f"stars{old_rating}"] = F(f"stars{old_rating}") - 1
+        if new_rating in STARS:
+            updates[f"stars{new_rating}"] = F(f"stars{new_rating}") + 1
+    Product.objects.filter(id=product_id).update(**updates)
+
+    # update() مش بيشغل signals المنتج: الترتيب والكاش بنحدثهم بعد الـ commit،
+    # عشان طلب في النص ما يخزنش الأرقام القديمة تحت الـ version الجديدة
+    transaction.on_commit(lambda: _product_changed(product_id))
+
+
+def _product_changed(product_id):
+    fields = ("id", "category_id", "user_id", "approval_status", "rating", "numReviews")
+    product = Product.objects.only(*fields).filter(id=product_id).first()
+    if product is None:
+        return
+    leaderboard.update_product(product)
+    invalidate_product_details([product_id])
+    if product.user_id:
+        bump_vendor_versions([product.user_id])
+    bump_catalog_version()
+    suggestions.catalog_changed([product_id])
+
+
+def review_added(product_id, rating):
+    _apply(product_id, new_rating=rating)
+
+
+def review_changed(product_id, old_rating, new_rating):
+    _apply(product_id, old_rating=old_rating, new_rating=new_rating)
+
+
+def review_removed(product_id, rating):
+    _apply(product_id, old_rating=rating)
+
+
+def review_aggregates():
+    """{product_id: {field: value}} computed from Review in one grouped query."""
+    rows = (
+        Review.objects.order_by()
+        .values("product_id")
+        .annotate(
+            numReviews=Count("id"),
+            ratingSum=Sum("rating"),
+            **{f"stars{s}": Count("id", filter=Q(rating=s)) for s in STARS},
+        )
+    )
+    aggregates = {}
+    for row in rows.iterator():
+        product_id = row.pop("product_id")
+        row["rating"] = round(row["ratingSum"] / row["numReviews"], 2)
+        aggregates[product_id] = row
+    return aggregates
+
+
+def reconcile(batch_size=1000):
+    """Rebuild the aggregates of every product; returns how many were off."""
+    aggregates = review_aggregates()
+    empty = dict.fromkeys(AGGREGATE_FIELDS, 0)
+    now = timezone.now()
+
+    fixed = 0
+    product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+    with transaction.atomic():
+        # على دفعات بالـ id عشان منكتبش في الجدول وإحنا بنقرا منه بـ iterator
+        for start in range(0, len(product_ids), batch_size):
+            chunk = product_ids[start : start + batch_size]
+            batch = []
+            for product in Product.objects.only("id", *AGGREGATE_FIELDS).filter(id__in=chunk):
+                expected = aggregates.get(product.id, empty)
+                if all(
+                    float(getattr(product, field)) == float(expected[field])
+                    for field in AGGREGATE_FIELDS
+                ):
+                    continue
+                for field in AGGREGATE_FIELDS:
+                    setattr(product, field, expected[field])
+                product.updatedAt = now
+                batch.append(product)
+            Product.objects.bulk_update(batch, AGGREGATE_FIELDS + ["updatedAt"])
+            fixed += len(batch)
+
+    if fixed:
+        # تغيير كبير: نعيد حساب الترتيب كله ونفضي كاش التفاصيل
+        leaderboard.refresh_all(batch_size=batch_size)
+        caches["product_detail"].clear()
+        bump_catalog_version()
+    return fixed
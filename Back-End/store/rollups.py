@@ -0,0 +1,241 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .cache import bump_vendor_versions
+from .models import DailyCategorySales, DailySales, DailyVendorSales, Order, OrderItem
+
+# ---------------------------------------------------------
+# Daily sales rollups
+# ---------------------------------------------------------
+# DailySales keeps one row per day (orders, sales, items sold, and the paid
+# part of them); DailyCategorySales / DailyVendorSales split the order lines
+# per category / vendor of the product. An order counts on the day it was
+# created. Checkout, payment, cancellation and deletion change the rows with
+# F() increments inside their transaction, so the dashboard reads a handful
+# of day rows instead of aggregating every order.
+#
+# A cancelled order is not a sale: cancelling takes it out of the rollups and
+# the rebuild skips it, the same rule as the vendor analytics revenue.
+#
+# Category and vendor come from the snapshot checkout stores on each
+# OrderItem, so moving a product to another category or vendor later does
+# not move its past sales; `manage.py rebuild_sales_rollups` recomputes
+# everything from Order / OrderItem.
+
+CENT = Decimal("0.01")
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+LINE_TOTAL = Sum(F("price") * F("qty"), output_field=MONEY)
+CANCELLED = "Cancelled"
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _add(model, keys, **amounts):
+    """Add amounts to the row identified by keys, creating it the first time."""
+    changes = {field: F(field) + value for field, value in amounts.items()}
+    if model.objects.filter(**keys).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **amounts)
+    except IntegrityError:
+        # طلب تاني عمل صف اليوم ده في نفس اللحظة
+        model.objects.filter(**keys).update(**changes)
+
+
+def _lines(order):
+    return list(
+        OrderItem.objects.filter(order=order).values_list(
+            "category_id", "vendor_id", "qty", "price"
+        )
+    )
+
+
+def _apply(order, sign):
+    day = timezone.localdate(order.createdAt)
+    lines = _lines(order)
+
+    totals = {
+        "orders": sign,
+        "sales": sign * _money(order.totalPrice),
+        "items": sign * sum(qty for _, _, qty, _ in lines),
+    }
+    if order.isPaid:
+        totals.update(paidOrders=sign, paidSales=sign * _money(order.totalPrice))
+    _add(DailySales, {"day": day}, **totals)
+
+    per_category = defaultdict(lambda: [0, Decimal(0)])
+    per_vendor = defaultdict(lambda: [0, Decimal(0)])
+    for category_id, vendor_id, qty, price in lines:
+        for groups, key in ((per_category, category_id), (per_vendor, vendor_id)):
+            if key is not None:
+                groups[key][0] += qty
+                groups[key][1] += _money(price) * qty
+    for model, field, groups in (
+        (DailyCategorySales, "category_id", per_category),
+        (DailyVendorSales, "vendor_id", per_vendor),
+    ):
+        for key, (items, sales) in groups.items():
+            _add(model, {"day": day, field: key}, orders=sign, items=sign * items, sales=sign * sales)
+
+    # إحصائيات البائعين دول اتغيرت: الكاش بيتلغي بعد الـ commit
+    vendors = list(per_vendor)
+    transaction.on_commit(lambda: bump_vendor_versions(vendors))
+
+
+def order_created(order):
+    _apply(order, 1)
+
+
+def order_cancelled(order):
+    _apply(order, -1)
+
+
+def order_removed(order):
+    # الطلب الملغي اتشال من الإحصائيات وقت الإلغاء
+    if order.status != CANCELLED:
+        _apply(order, -1)
+
+
+def order_paid(order):
+    if order.status == CANCELLED:
+        return
+    day = timezone.localdate(order.createdAt)
+    _add(DailySales, {"day": day}, paidOrders=1, paidSales=_money(order.totalPrice))
+
+
+# ----- rebuild -----
+def _daily_rows():
+    days = defaultdict(dict)
+    orders = (
+        Order.objects.exclude(status=CANCELLED)
+        .annotate(day=TruncDate("createdAt"))
+        .values("day")
+        .annotate(
+            orders=Count("id"),
+            sales=Sum("totalPrice"),
+            paidOrders=Count("id", filter=Q(isPaid=True)),
+            paidSales=Sum("totalPrice", filter=Q(isPaid=True)),
+        )
+        .order_by()
+    )
+    for row in orders:
+        days[row.pop("day")].update(row)
+    items = (
+        OrderItem.objects.exclude(order__status=CANCELLED)
+        .annotate(day=TruncDate("order__createdAt"))
+        .values("day")
+        .annotate(items=Sum("qty"))
+        .order_by()
+    )
+    for row in items:
+        days[row["day"]]["items"] = row["items"]
+    return [
+        DailySales(
+            day=day,
+            orders=row.get("orders", 0),
+            sales=_money(row.get("sales")),
+            items=row.get("items") or 0,
+            paidOrders=row.get("paidOrders", 0),
+            paidSales=_money(row.get("paidSales")),
+        )
+        for day, row in days.items()
+    ]
+
+
+def _split_rows(model, field):
+    # field: العمود المتسجل على OrderItem وقت الطلب وفي الـ rollup (category_id / vendor_id)
+    rows = (
+        OrderItem.objects.filter(**{f"{field}__isnull": False})
+        .exclude(order__status=CANCELLED)
+        .annotate(day=TruncDate("order__createdAt"))
+        .values("day", field)
+        .annotate(orders=Count("order_id", distinct=True), items=Sum("qty"), sales=LINE_TOTAL)
+        .order_by()
+    )
+    return [
+        model(
+            day=row["day"],
+            orders=row["orders"],
+            items=row["items"],
+            sales=_money(row["sales"]),
+            **{field: row[field]},
+        )
+        for row in rows
+    ]
+
+
+def rebuild(batch_size=1000):
+    """Recompute every rollup row from the orders; returns the number of days."""
+    with transaction.atomic():
+        daily = _daily_rows()
+        per_category = _split_rows(DailyCategorySales, "category_id")
+        per_vendor = _split_rows(DailyVendorSales, "vendor_id")
+        for model, rows in (
+            (DailySales, daily),
+            (DailyCategorySales, per_category),
+            (DailyVendorSales, per_vendor),
+        ):
+            model.objects.all().delete()
+            model.objects.bulk_create(rows, batch_size=batch_size)
+    return len(daily)
+
+
+# ----- reads -----
+def window_start(days):
+    """First day of a window of `days` days ending today."""
+    return timezone.localdate() - timedelta(days=days - 1)
+
+
+def totals():
+    return DailySales.objects.aggregate(
+        orders=Coalesce(Sum("orders"), 0),
+        sales=Coalesce(Sum("sales"), Decimal(0), output_field=MONEY),
+        items=Coalesce(Sum("items"), 0),
+    )
+
+
+def daily_series(days):
+    """One point per day of the window, zero-filled where nothing was sold."""
+    start = window_start(days)
+    rows = {row.day: row for row in DailySales.objects.filter(day__gte=start)}
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day)
+        series.append(
+            {
+                "date": day.isoformat(),
+                "name": day.strftime("%d/%m"),
+                "sales": row.sales if row else 0,
+                "orders": row.orders if row else 0,
+                "items": row.items if row else 0,
+            }
+        )
+    return series
+
+
+def top_categories(days, limit):
+    return list(
+        DailyCategorySales.objects.filter(day__gte=window_start(days))
+        .values("category_id", name=F("category__name"))
+        .annotate(sales=Sum("sales"), orders=Sum("orders"), items=Sum("items"))
+        .order_by("-sales", "category_id")[:limit]
+    )
+
+
+def top_vendors(days, limit):
+    return list(
+        DailyVendorSales.objects.filter(day__gte=window_start(days))
+        .values("vendor_id", name=F("vendor__first_name"))
+        .annotate(sales=Sum("sales"), orders=Sum("orders"), items=Sum("items"))
+        .order_by("-sales", "vendor_id")[:limit]
+    )
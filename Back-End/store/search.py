@@ -0,0 +1,151 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# ---------------------------------------------------------
+# Full-text search index for products (SQLite FTS5)
+# ---------------------------------------------------------
+# The index is a shadow table keyed by the product id (rowid). It is kept in
+# sync by the signals in store/signals.py and can be rebuilt from scratch with
+# `python manage.py rebuild_search_index`.
+
+FTS_TABLE = "store_product_fts"
+
+# bm25 weights, in the same order as the FTS columns below
+RANK_WEIGHTS = {
+    "name": 10.0,
+    "brand": 5.0,
+    "category": 4.0,
+    "tags": 3.0,
+    "description": 1.0,
+}
+
+# ترتيب نتايج البحث: الأقرب للكلمة الأول (bm25 أصغر = أقرب)، والـ id في الآخر للـ cursor
+RANKED_ORDERING = ("search_rank", "-createdAt", "-id")
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+CREATE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    name, brand, category, tags, description,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# One INSERT ... SELECT per batch, so indexing never materializes products in Python
+INDEX_SQL = f"""
+INSERT INTO {FTS_TABLE} (rowid, name, brand, category, tags, description)
+SELECT
+    p.id,
+    p.name,
+    COALESCE(p.brand, ''),
+    COALESCE(c.name, ''),
+    COALESCE((
+        SELECT group_concat(t.name, ' ')
+        FROM store_product_tags pt
+        JOIN store_tag t ON t.id = pt.tag_id
+        WHERE pt.product_id = p.id
+    ), ''),
+    COALESCE(p.description, '')
+FROM store_product p
+LEFT JOIN store_category c ON c.id = p.category_id
+"""
+
+
+def is_supported():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(keyword):
+    # كل كلمة بتتحول لـ prefix query: "lap"* بتطابق laptop و laptops
+    terms = TOKEN_RE.findall(keyword or "")
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+# SQLite caps the number of bound parameters per statement
+ID_CHUNK_SIZE = 500
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        chunk = ids[start : start + ID_CHUNK_SIZE]
+        yield chunk, ", ".join(["%s"] * len(chunk))
+
+
+def remove_products(product_ids):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        for chunk, placeholders in _chunks(product_ids):
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk
+            )
+
+
+def index_products(product_ids):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        for chunk, placeholders in _chunks(product_ids):
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk
+            )
+            cursor.execute(f"{INDEX_SQL} WHERE p.id IN ({placeholders})", chunk)
+
+
+def rebuild_index(batch_size=1000):
+    from .models import Product
+
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    total = 0
+    batch = []
+    ids = Product.objects.order_by("id").values_list("id", flat=True)
+    for product_id in ids.iterator(chunk_size=batch_size):
+        batch.append(product_id)
+        if len(batch) >= batch_size:
+            index_products(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        index_products(batch)
+        total += len(batch)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def search_products(queryset, keyword):
+    """Filter a Product queryset by keyword, best matches first."""
+    match = build_match_query(keyword)
+    if not match:
+        return queryset
+
+    if not is_supported():
+        # باقي قواعد البيانات: نرجع للبحث القديم
+        return queryset.filter(
+            Q(name__icontains=keyword)
+            | Q(description__icontains=keyword)
+            | Q(brand__icontains=keyword)
+            | Q(category__name__icontains=keyword)
+        )
+
+    weights = ", ".join(str(w) for w in RANK_WEIGHTS.values())
+    product_table = queryset.model._meta.db_table
+    # الـ rank annotation (مش extra select) عشان الـ cursor pagination تقدر تفلتر بيه
+    return (
+        queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {product_table}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+        )
+        .annotate(search_rank=RawSQL(f"bm25({FTS_TABLE}, {weights})", (), output_field=FloatField()))
+        .order_by(*RANKED_ORDERING)
+    )
@@ -1,5 +1,9 @@
+from functools import lru_cache
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from .models import *
 
 
@@ -51,6 +55,17 @@ class ReviewSerializer(serializers.ModelSerializer):
         return obj.user.first_name if obj.user else "Anonymous"
 
 
+def embedded_reviews(queryset):
+    # آخر N ريفيو بس جوه المنتج، والباقي من products/<pk>/reviews/
+    return queryset.select_related("user").order_by("-createdAt", "-id")[
+        : settings.PRODUCT_EMBEDDED_REVIEWS
+    ]
+
+
+def rating_histogram(product):
+    return {str(star): getattr(product, f"stars{star}") for star in range(1, 6)}
+
+
 # ---------------------------------------------------------
 # 3. Product Images (الصور الفرعية)
 # ---------------------------------------------------------
@@ -64,15 +79,151 @@ class ProductImageSerializer(serializers.ModelSerializer):
 # 4. Products (المنتجات)
 # ---------------------------------------------------------
 class ProductSerializer(serializers.ModelSerializer):
-    reviews = ReviewSerializer(many=True, read_only=True)
+    reviews = serializers.SerializerMethodField(read_only=True)
+    rating_histogram = serializers.SerializerMethodField(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
     user_name = serializers.CharField(source='user.first_name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
 
     tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+
     class Meta:
         model = Product
-        fields = '__all__'
+        # العدادات الخام بتطلع في rating_histogram
+        exclude = ["ratingSum", "stars1", "stars2", "stars3", "stars4", "stars5"]
+
+    # None = كل الحقول، أو قائمة بالحقول المطلوبة بس (sparse fieldsets)
+    default_fields = None
+
+    # العلاقات اللي كل حقل محتاجها، عشان أي view ترجع منتجات تجيبها مرة واحدة
+    select_related_fields = {
+        "user_name": "user__first_name",
+        "category_name": "category__name",
+    }
+    prefetch_related_fields = ["reviews", "images", "tags"]
+
+    # حقول محسوبة من أعمدة المنتج نفسه
+    computed_fields = {"rating_histogram": ["stars1", "stars2", "stars3", "stars4", "stars5"]}
+
+    # الـ views بتعتمد على الحقول دي (الترتيب والـ cursor والتقسيم على الأقسام)
+    always_loaded_fields = ["id", "createdAt", "category"]
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", self.default_fields)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, prefix="", fields=None):
+        fields = fields or cls.default_fields
+        wanted = set(fields) if fields is not None else None
+
+        def needed(name):
+            return wanted is None or name in wanted
+
+        selects = [
+            prefix + path.split("__")[0]
+            for name, path in cls.select_related_fields.items()
+            if needed(name)
+        ]
+        prefetches = []
+        for name in cls.prefetch_related_fields:
+            if not needed(name):
+                continue
+            if name == "reviews":
+                prefetches.append(
+                    Prefetch(
+                        prefix + "reviews",
+                        queryset=embedded_reviews(Review.objects),
+                        to_attr="latest_reviews",
+                    )
+                )
+            else:
+                prefetches.append(prefix + name)
+        queryset = queryset.select_related(*selects).prefetch_related(*prefetches)
+
+        # .only() بيقلل الأعمدة اللي بتتقرا (الوصف مثلاً) لما الحقول محددة
+        if wanted is not None and not prefix:
+            columns = {f.name for f in Product._meta.concrete_fields} & wanted
+            columns.update(cls.always_loaded_fields)
+            for name, path in cls.select_related_fields.items():
+                if name in wanted:
+                    columns.update([path.split("__")[0], path])
+            for name, sources in cls.computed_fields.items():
+                if name in wanted:
+                    columns.update(sources)
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def get_reviews(self, obj):
+        reviews = getattr(obj, "latest_reviews", None)
+        if reviews is None:
+            reviews = embedded_reviews(obj.reviews.all())
+        return ReviewSerializer(reviews, many=True).data
+
+    def get_rating_histogram(self, obj):
+        return rating_histogram(obj)
+
+
+# كارت المنتج: الحقول اللي الـ grid محتاجها بس (من غير reviews ولا صور ولا وصف)
+PRODUCT_CARD_FIELDS = [
+    "id",
+    "name",
+    "brand",
+    "image",
+    "price",
+    "discount_price",
+    "countInStock",
+    "rating",
+    "numReviews",
+    "isFeatured",
+    "category",
+    "category_name",
+    "user",
+    "user_name",
+    "approval_status",
+    "createdAt",
+]
+
+
+class ProductCardSerializer(ProductSerializer):
+    default_fields = PRODUCT_CARD_FIELDS
+
+
+@lru_cache(maxsize=None)
+def _product_field_names():
+    return frozenset(ProductSerializer().fields)
+
+
+def requested_product_fields(request, default=PRODUCT_CARD_FIELDS):
+    """Resolve ?fields=a,b (exact set) or ?expand=reviews,images (card + extras)."""
+    available = _product_field_names()
+
+    def parse(param):
+        raw = request.query_params.get(param) or ""
+        return [f.strip() for f in raw.split(",") if f.strip() in available]
+
+    if request.query_params.get("fields"):
+        return ["id"] + [f for f in parse("fields") if f != "id"]
+    return list(default) + [f for f in parse("expand") if f not in default]
+
+
+class ProductPriceStockSerializer(serializers.Serializer):
+    """One item of the bulk price / stock update (only the sent fields change)."""
+
+    id = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    discount_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False, allow_null=True
+    )
+    countInStock = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if len(attrs) == 1:
+            raise serializers.ValidationError("Nothing to update.")
+        return attrs
 
 
 # ---------------------------------------------------------
@@ -81,7 +232,8 @@ class ProductSerializer(serializers.ModelSerializer):
 class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
-        fields = "__all__"
+        # category / vendor: نسخة داخلية للإحصائيات، مش جزء من الـ API
+        exclude = ("category", "vendor")
 
 
 # ---------------------------------------------------------
@@ -105,6 +257,11 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = "__all__"
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # المستخدم والعنوان في نفس الـ query، والعناصر في query واحد لكل الطلبات
+        return queryset.select_related("user", "shippingaddress").prefetch_related("items")
+
     def get_orderItems(self, obj):
         items = obj.items.all()
         serializer = OrderItemSerializer(items, many=True)
@@ -118,24 +275,39 @@ class OrderSerializer(serializers.ModelSerializer):
         return address
 
 
+class OrderStatusSerializer(serializers.Serializer):
+    """One item of the bulk order status change."""
+
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+
 # ---------------------------------------------------------
 # 8. Cart Items (عناصر السلة من الداتابيز)
 # ---------------------------------------------------------
 class CartItemSerializer(serializers.ModelSerializer):
     # بنرجع تفاصيل المنتج كاملة عشان الفرونت يعرض الصورة والاسم
-    product_details = ProductSerializer(source="product", read_only=True)
+    product_details = ProductCardSerializer(source="product", read_only=True)
 
     class Meta:
         model = CartItem
         fields = ["id", "product", "product_details", "qty"]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return ProductCardSerializer.setup_eager_loading(queryset, prefix="product__")
+
 
 # ---------------------------------------------------------
 # 9. Wishlist Items (عناصر المفضلة من الداتابيز)
 # ---------------------------------------------------------
 class WishlistItemSerializer(serializers.ModelSerializer):
-    product_details = ProductSerializer(source="product", read_only=True)
+    product_details = ProductCardSerializer(source="product", read_only=True)
 
     class Meta:
         model = WishlistItem
         fields = ["id", "product", "product_details"]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return ProductCardSerializer.setup_eager_loading(queryset, prefix="product__")
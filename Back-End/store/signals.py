@@ -0,0 +1,211 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import leaderboard, ratings, search
+from .suggest import suggestions
+from .cache import bump_catalog_version, bump_version, invalidate_product_details
+from .models import Category, Product, ProductImage, Review, Tag
+
+
+# ---------------------------------------------------------
+# 1. Search index sync
+# ---------------------------------------------------------
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_deleted_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def index_retagged_products(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            search.index_products([instance.pk])
+        return
+
+    # التعديل من ناحية التاج: pk_set هنا هي أرقام المنتجات
+    if action == "pre_clear":
+        instance._indexed_product_ids = list(
+            instance.product_set.values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        search.index_products(getattr(instance, "_indexed_product_ids", []))
+    elif action in ("post_add", "post_remove"):
+        search.index_products(pk_set or [])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def index_renamed_label(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    search.index_products(instance.product_set.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Tag)
+def remember_labelled_products(sender, instance, **kwargs):
+    # الحذف بيفك العلاقة من غير signals، فبنحفظ المنتجات المتأثرة قبلها
+    instance._indexed_product_ids = list(
+        instance.product_set.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def index_unlabelled_products(sender, instance, **kwargs):
+    search.index_products(getattr(instance, "_indexed_product_ids", []))
+
+
+# ---------------------------------------------------------
+# 2. Catalog cache version
+# ---------------------------------------------------------
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_catalog_cache(sender, raw=False, **kwargs):
+    if not raw:
+        bump_catalog_version()
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def invalidate_catalog_cache_on_retag(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_catalog_version()
+
+
+# ---------------------------------------------------------
+# 3. Top-products leaderboard
+# ---------------------------------------------------------
+@receiver(post_save, sender=Product)
+def rank_saved_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        leaderboard.update_product(instance)
+
+
+# ---------------------------------------------------------
+# 4. Typeahead prefix index (after the version bump above)
+# ---------------------------------------------------------
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def suggest_product_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        suggestions.catalog_changed([instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def suggest_version_changed(sender, raw=False, **kwargs):
+    # مش بيغير الاقتراحات، بس لازم الـ index يعرف إن الـ version اتحرك
+    if not raw:
+        suggestions.catalog_changed()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def suggest_labels_changed(sender, raw=False, **kwargs):
+    if not raw:
+        suggestions.catalog_changed(reload=True)
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def suggest_product_retagged(sender, instance, action, reverse, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        if reverse:
+            suggestions.catalog_changed(reload=True)
+        else:
+            suggestions.catalog_changed([instance.pk])
+
+
+# ---------------------------------------------------------
+# 5. Conditional GETs and the product detail cache
+#    (Product.updatedAt, category/tag versions)
+# ---------------------------------------------------------
+def touch_products(product_ids):
+    # update() مباشرة: من غير ما نشغل signals الحفظ تاني
+    product_ids = list(product_ids)
+    Product.objects.filter(id__in=product_ids).update(updatedAt=timezone.now())
+    invalidate_product_details(product_ids)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def drop_cached_product_detail(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_product_details([instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_product_of(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_products([instance.product_id])
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def touch_retagged_products(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        touch_products([instance.pk])
+    elif action == "post_clear":
+        touch_products(getattr(instance, "_indexed_product_ids", []))
+    else:
+        touch_products(pk_set or [])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def touch_labelled_products(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        touch_products(instance.product_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def touch_unlabelled_products(sender, instance, **kwargs):
+    touch_products(getattr(instance, "_indexed_product_ids", []))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_categories_version(sender, raw=False, **kwargs):
+    if not raw:
+        bump_version("categories")
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tags_version(sender, raw=False, **kwargs):
+    if not raw:
+        bump_version("tags")
+
+
+# ---------------------------------------------------------
+# 6. Rating aggregates on review deletes
+#    (create / edit go through the review views)
+# ---------------------------------------------------------
+@receiver(post_delete, sender=Review)
+def remove_review_rating(sender, instance, origin=None, **kwargs):
+    # لو الحذف جاي من حذف المنتج نفسه (cascade) مفيش حاجة نحدثها
+    if isinstance(origin, Review) or getattr(origin, "model", None) is Review:
+        ratings.review_removed(instance.product_id, instance.rating)
@@ -0,0 +1,218 @@
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+from .cache import get_catalog_version
+from .models import Product, ProductRanking
+
+# ---------------------------------------------------------
+# Typeahead suggestions from an in-process prefix index
+# ---------------------------------------------------------
+# Every product name, brand, category and tag is stored in one sorted list of
+# (key, kind, ref) tuples, once per word it can be found by ("gaming laptop"
+# and "laptop" for "Gaming Laptop"). A prefix lookup is a bisect plus a short
+# forward scan, with no database access.
+#
+# The index loads lazily on the first request and remembers the catalog
+# version it reflects. Writes made in this process are applied incrementally
+# from the signals; if the version moved for any other reason (another worker
+# wrote to the catalog, a label was renamed) the index is rebuilt in a
+# background thread while lookups keep reading the old one, at most once per
+# SUGGEST["RELOAD_INTERVAL"] seconds.
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+LABEL_KINDS = ("brand", "category", "tag")
+
+
+def normalize(text):
+    return " ".join(TOKEN_RE.findall((text or "").casefold()))
+
+
+def word_keys(text):
+    words = normalize(text).split()
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+class SuggestionIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.reloading = False
+        self.reloaded_at = None
+        self.keys = []
+        self.products = {}
+        self.counts = {kind: Counter() for kind in LABEL_KINDS}
+
+    # ----- building -----
+    def _product_docs(self, product_ids=None):
+        products = Product.objects.filter(approval_status="approved")
+        tags = Product.tags.through.objects.filter(product__approval_status="approved")
+        rankings = ProductRanking.objects.all()
+        if product_ids is not None:
+            products = products.filter(id__in=product_ids)
+            tags = tags.filter(product_id__in=product_ids)
+            rankings = rankings.filter(product_id__in=product_ids)
+
+        scores = dict(rankings.values_list("product_id", "score"))
+        tag_names = {}
+        for product_id, name in tags.values_list("product_id", "tag__name"):
+            tag_names.setdefault(product_id, []).append(name)
+
+        for product_id, name, brand, category in products.values_list(
+            "id", "name", "brand", "category__name"
+        ).iterator():
+            labels = [("brand", brand), ("category", category)]
+            labels += [("tag", tag) for tag in tag_names.get(product_id, [])]
+            yield product_id, {
+                "name": name,
+                "score": scores.get(product_id, 0.0),
+                "labels": [(kind, label) for kind, label in labels if label],
+            }
+
+    def _build(self):
+        version = get_catalog_version()
+        keys = []
+        products = {}
+        counts = {kind: Counter() for kind in LABEL_KINDS}
+        for product_id, doc in self._product_docs():
+            products[product_id] = doc
+            keys.extend((key, "product", product_id) for key in word_keys(doc["name"]))
+            for kind, label in doc["labels"]:
+                if not counts[kind][label]:
+                    keys.extend((key, kind, label) for key in word_keys(label))
+                counts[kind][label] += 1
+        keys.sort()
+        return version, keys, products, counts
+
+    def _install(self, version, keys, products, counts):
+        with self.lock:
+            # ما نرجعش لـ index أقدم من اللي اتحدث incrementally في الوقت ده
+            if self.version is not None and version < self.version:
+                return
+            self.keys, self.products, self.counts = keys, products, counts
+            self.version = version
+
+    def _load(self):
+        self._install(*self._build())
+
+    def _spawn(self, target):
+        def run():
+            try:
+                target()
+            finally:
+                # الـ thread ليه connection خاص بيه
+                connection.close()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _reload(self):
+        try:
+            self._load()
+        finally:
+            self.reloading = False
+
+    def _schedule_reload(self):
+        with self.lock:
+            now = time.monotonic()
+            interval = settings.SUGGEST["RELOAD_INTERVAL"]
+            if self.reloading or (
+                self.reloaded_at is not None and now - self.reloaded_at < interval
+            ):
+                return
+            self.reloading = True
+            self.reloaded_at = now
+        self._spawn(self._reload)
+
+    def _discard(self, entry):
+        i = bisect_left(self.keys, entry)
+        if i < len(self.keys) and self.keys[i] == entry:
+            del self.keys[i]
+
+    def _add(self, product_id, doc):
+        self.products[product_id] = doc
+        for key in word_keys(doc["name"]):
+            insort(self.keys, (key, "product", product_id))
+        for kind, label in doc["labels"]:
+            if not self.counts[kind][label]:
+                for key in word_keys(label):
+                    insort(self.keys, (key, kind, label))
+            self.counts[kind][label] += 1
+
+    def _remove(self, product_id):
+        doc = self.products.pop(product_id, None)
+        if doc is None:
+            return
+        for key in word_keys(doc["name"]):
+            self._discard((key, "product", product_id))
+        for kind, label in doc["labels"]:
+            self.counts[kind][label] -= 1
+            if self.counts[kind][label] <= 0:
+                del self.counts[kind][label]
+                for key in word_keys(label):
+                    self._discard((key, kind, label))
+
+    # ----- sync -----
+    def catalog_changed(self, product_ids=(), reload=False):
+        """Called after a catalog write in this process (see store/signals.py)."""
+        with self.lock:
+            if self.version is None:
+                return
+            current = get_catalog_version()
+            if reload or current != self.version + 1:
+                # تغيير من process تانية أو تغيير كبير: الـ version مش هيطابق،
+                # فأول طلب بيعيد التحميل في الخلفية
+                return
+            product_ids = set(product_ids)
+            for product_id in product_ids:
+                self._remove(product_id)
+            for product_id, doc in self._product_docs(product_ids):
+                self._add(product_id, doc)
+            self.version = current
+
+    # ----- lookup -----
+    def suggest(self, prefix, limit):
+        prefix = normalize(prefix)
+        if not prefix:
+            return {"products": [], "brands": [], "categories": [], "tags": []}
+
+        if self.version is None:
+            # أول طلب: مفيش index قديم نرجع منه
+            with self.lock:
+                if self.version is None:
+                    self._load()
+        elif self.version != get_catalog_version():
+            self._schedule_reload()
+
+        with self.lock:
+            found = {"product": {}, "brand": {}, "category": {}, "tag": {}}
+            i = bisect_left(self.keys, (prefix,))
+            end = min(len(self.keys), i + settings.SUGGEST["MAX_SCAN"])
+            while i < end and self.keys[i][0].startswith(prefix):
+                _, kind, ref = self.keys[i]
+                if kind == "product":
+                    doc = self.products[ref]
+                    found[kind][ref] = (doc["score"], doc["name"])
+                else:
+                    found[kind][ref] = (self.counts[kind][ref], ref)
+                i += 1
+
+        def top(kind):
+            return heapq.nlargest(limit, found[kind].items(), key=lambda item: item[1][0])
+
+        return {
+            "products": [{"id": ref, "name": name} for ref, (_, name) in top("product")],
+            "brands": [{"name": ref, "count": count} for ref, (count, _) in top("brand")],
+            "categories": [
+                {"name": ref, "count": count} for ref, (count, _) in top("category")
+            ],
+            "tags": [{"name": ref, "count": count} for ref, (count, _) in top("tag")],
+        }
+
+
+suggestions = SuggestionIndex()
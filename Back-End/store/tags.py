@@ -0,0 +1,38 @@
+from django.db import transaction
+
+from .cache import bump_version
+from .models import Tag
+
+# ---------------------------------------------------------
+# Tag-set helpers shared by every write path that touches tags
+# ---------------------------------------------------------
+# Names are resolved with one IN query; the missing ones are created with one
+# bulk insert (ignore_conflicts, so two requests adding the same new tag don't
+# fail on the unique name). bulk_create fires no post_save, so the "tags"
+# version behind the /tags/ ETag is bumped here, after the commit. A product's
+# tags are then synced by diff: only the added links are inserted and only the
+# dropped ones deleted.
+
+
+def clean_tag_names(names):
+    return sorted({str(name).strip()[:100] for name in names if str(name).strip()})
+
+
+def resolve_tags(names):
+    """Return {name: id} for `names`, creating the tags that don't exist yet."""
+    names = set(names)
+    if not names:
+        return {}
+    existing = dict(Tag.objects.filter(name__in=names).values_list("name", "id"))
+    missing = names - set(existing)
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        existing.update(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+        transaction.on_commit(lambda: bump_version("tags"))
+    return existing
+
+
+def sync_tags(product, names):
+    # set() بيقارن بالموجود: insert واحد للجديد و delete واحد للي اتشال
+    tag_ids = resolve_tags(clean_tag_names(names)).values()
+    product.tags.set(tag_ids)
@@ -1,3 +1,1370 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase, force_authenticate
+
+from . import exporters, importers, orders, ratings, rollups, search
+from .cache import bump_catalog_version, get_catalog_version, get_version
+from .idempotency import idempotent
+from .models import *
+from .suggest import SuggestionIndex, suggestions
+
+
+# ---------------------------------------------------------
+# 1. Query counts for endpoints that return products
+# ---------------------------------------------------------
+class ProductQueryCountTests(APITestCase):
+    """Every list endpoint must cost the same number of queries however many
+    products, reviews, images and tags it returns (no N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create_user("vendor", "vendor@example.com", "pass")
+        cls.buyer = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        reviewers = [
+            User.objects.create_user(f"reviewer{i}", f"r{i}@example.com", "pass")
+            for i in range(3)
+        ]
+        tags = [Tag.objects.create(name=f"tag{i}") for i in range(3)]
+
+        for c in range(2):
+            category = Category.objects.create(name=f"Category {c}")
+            for p in range(4):
+                product = Product.objects.create(
+                    user=cls.vendor,
+                    category=category,
+                    name=f"Product {c}-{p}",
+                    price=10,
+                    approval_status="approved",
+                )
+                product.tags.set(tags)
+                ProductImage.objects.create(product=product, image="product_gallery/x.png")
+                for reviewer in reviewers:
+                    Review.objects.create(product=product, user=reviewer, rating=4)
+                CartItem.objects.create(user=cls.buyer, product=product)
+                WishlistItem.objects.create(user=cls.buyer, product=product)
+
+    def setUp(self):
+        cache.clear()
+        caches["product_detail"].clear()
+
+    def assertQueries(self, num, url, user=None):
+        if user:
+            self.client.force_authenticate(user)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_products(self):
+        # the card shape needs a single query
+        self.assertQueries(1, "/api/products/")
+
+    def test_products_legacy_pages(self):
+        # ... + COUNT(*) for the page count
+        self.assertQueries(2, "/api/products/?page=1")
+
+    def test_products_expanded(self):
+        # ... + one prefetch per expanded relation
+        response = self.assertQueries(3, "/api/products/?expand=reviews,images")
+        self.assertEqual(len(response.json()["products"][0]["reviews"]), 3)
+
+    def test_products_sparse_fields(self):
+        response = self.assertQueries(1, "/api/products/?fields=name,price")
+        self.assertEqual(set(response.json()["products"][0]), {"id", "name", "price"})
+
+    def test_product_detail(self):
+        # ETag lookup, then the full shape: product + reviews + images + tags
+        product = Product.objects.first()
+        response = self.assertQueries(5, f"/api/products/{product.id}/")
+        self.assertEqual(len(response.json()["reviews"]), 3)
+        # later hits come from the detail cache
+        self.assertQueries(1, f"/api/products/{product.id}/")
+        Review.objects.create(product=product, user=self.buyer, rating=5)
+        response = self.assertQueries(5, f"/api/products/{product.id}/")
+        self.assertEqual(len(response.json()["reviews"]), 4)
+
+    def test_top_products(self):
+        # leaderboard ids + products
+        response = self.assertQueries(2, "/api/products/top/?limit=6")
+        self.assertEqual(len(response.json()), 6)
+
+    def test_shop_view(self):
+        # one windowed query for every category
+        response = self.assertQueries(1, "/api/products/shop-view/?limit=3")
+        section = response.json()[0]
+        self.assertEqual(len(section["products"]), 3)
+        self.assertEqual(section["total"], 4)
+        # the rest of the category, under the same /api/ prefix
+        self.assertTrue(section["more"].startswith("http://testserver/api/products/?"))
+        rest = self.client.get(section["more"]).json()["products"]
+        self.assertEqual(len(rest), 1)
+
+    def test_my_products(self):
+        self.assertQueries(1, "/api/products/myproducts/", user=self.vendor)
+
+    def test_cart(self):
+        response = self.assertQueries(1, "/api/cart/", user=self.buyer)
+        self.assertEqual(len(response.json()), 8)
+
+    def test_wishlist(self):
+        response = self.assertQueries(1, "/api/wishlist/", user=self.buyer)
+        self.assertEqual(len(response.json()), 8)
+
+
+# ---------------------------------------------------------
+# 2. Indexes behind the hot queries (EXPLAIN QUERY PLAN)
+# ---------------------------------------------------------
+class IndexUsageTests(TestCase):
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_public_products(self):
+        queryset = Product.objects.filter(approval_status="approved").order_by(
+            "-createdAt", "-id"
+        )
+        self.assertUsesIndex(queryset, "product_approved_created_idx")
+
+    def test_category_products(self):
+        queryset = Product.objects.filter(
+            category_id=1, approval_status="approved"
+        ).order_by("-createdAt", "-id")
+        self.assertUsesIndex(queryset, "product_category_created_idx")
+
+    def test_top_products(self):
+        queryset = ProductRanking.objects.order_by("-score", "product")[:5]
+        self.assertUsesIndex(queryset, "ranking_score_idx")
+
+    def test_cart_and_wishlist_items(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        # SQLite backs the unique constraints with its own autoindex
+        self.assertUsesIndex(
+            CartItem.objects.filter(user=user, product_id=1),
+            "INDEX sqlite_autoindex_store_cartitem_1 (user_id=? AND product_id=?)",
+        )
+        self.assertUsesIndex(
+            WishlistItem.objects.filter(user=user, product_id=1),
+            "INDEX sqlite_autoindex_store_wishlistitem_1 (user_id=? AND product_id=?)",
+        )
+
+    def test_my_orders(self):
+        queryset = Order.objects.filter(user_id=1).order_by("-createdAt")
+        self.assertUsesIndex(queryset, "order_user_created_idx")
+
+    def test_admin_orders_by_status(self):
+        queryset = Order.objects.filter(status__in=["Pending"]).order_by("-createdAt", "-id")
+        self.assertUsesIndex(queryset, "order_status_created_idx")
+
+    def test_user_by_email(self):
+        queryset = User.objects.filter(email="buyer@example.com")
+        self.assertUsesIndex(queryset, "users_auth_user_email_idx")
+
+    def test_cart_item_is_unique(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        product = Product.objects.create(name="Product", price=10)
+        CartItem.objects.create(user=user, product=product)
+        with self.assertRaises(IntegrityError):
+            CartItem.objects.create(user=user, product=product)
+
+
+# ---------------------------------------------------------
+# 3. Checkout under concurrency
+# ---------------------------------------------------------
+class CheckoutConcurrencyTests(TransactionTestCase):
+    def checkout(self, user, product, qty=1):
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            return client.post(
+                "/api/orders/add/",
+                {
+                    "orderItems": [{"id": product.id, "qty": qty}],
+                    "paymentMethod": "PayPal",
+                    "taxPrice": 0,
+                    "shippingPrice": 0,
+                    "shippingAddress": {
+                        "address": "1 Street",
+                        "city": "Cairo",
+                        "postalCode": "11511",
+                        "country": "Egypt",
+                    },
+                },
+                format="json",
+            ).status_code
+        finally:
+            connections.close_all()
+
+    def test_one_sku_is_never_oversold(self):
+        stock = 5
+        product = Product.objects.create(name="Hot item", price=10, countInStock=stock)
+        buyers = [
+            User.objects.create_user(f"buyer{i}", f"buyer{i}@example.com", "pass")
+            for i in range(20)
+        ]
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            codes = list(pool.map(lambda user: self.checkout(user, product), buyers))
+
+        product.refresh_from_db()
+        self.assertEqual(codes.count(201), stock)
+        self.assertEqual(codes.count(400), len(buyers) - stock)
+        self.assertEqual(product.countInStock, 0)
+        self.assertEqual(OrderItem.objects.aggregate(sold=Sum("qty"))["sold"], stock)
+        self.assertEqual(DailySales.objects.get().orders, stock)
+
+    def test_oversold_line_rejects_the_whole_order(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        product = Product.objects.create(name="Item", price=10, countInStock=2)
+
+        self.assertEqual(self.checkout(user, product, qty=3), 400)
+        product.refresh_from_db()
+        self.assertEqual(product.countInStock, 2)
+        self.assertFalse(Order.objects.exists())
+
+
+# ---------------------------------------------------------
+# 4. Daily sales rollups
+# ---------------------------------------------------------
+class SalesRollupTests(APITestCase):
+    def setUp(self):
+        self.vendor = User.objects.create_user("vendor", "vendor@example.com", "pass")
+        self.admin = User.objects.create_user(
+            "admin", "admin@example.com", "pass", is_staff=True
+        )
+        category = Category.objects.create(name="Tech")
+        self.products = [
+            Product.objects.create(
+                user=self.vendor, category=category, name=f"P{i}", price=10 * (i + 1), countInStock=10
+            )
+            for i in range(2)
+        ]
+        self.client.force_authenticate(self.admin)
+
+    def checkout(self, *lines):
+        response = self.client.post(
+            "/api/orders/add/",
+            {
+                "orderItems": [{"id": p.id, "qty": qty} for p, qty in lines],
+                "paymentMethod": "PayPal",
+                "taxPrice": 1,
+                "shippingPrice": 2,
+                "shippingAddress": {
+                    "address": "1 Street",
+                    "city": "Cairo",
+                    "postalCode": "11511",
+                    "country": "Egypt",
+                },
+            },
+            format="json",
+        )
+        return response.data["id"]
+
+    def snapshot(self):
+        return [
+            sorted(model.objects.values_list(*fields))
+            for model, fields in (
+                (DailySales, ("day", "orders", "sales", "items", "paidOrders", "paidSales")),
+                (DailyCategorySales, ("day", "category", "orders", "sales", "items")),
+                (DailyVendorSales, ("day", "vendor", "orders", "sales", "items")),
+            )
+        ]
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        first = self.checkout((self.products[0], 2), (self.products[1], 1))
+        second = self.checkout((self.products[1], 3))
+        self.checkout((self.products[0], 1))
+        for _ in range(2):
+            self.client.put(f"/api/orders/{first}/pay/")
+        self.client.delete(f"/api/orders/delete/{second}/")
+
+        incremental = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+        day = DailySales.objects.get()
+        self.assertEqual((day.orders, day.items, day.paidOrders), (2, 4, 1))
+        self.assertEqual(day.paidSales, 43)
+
+    def test_sales_stay_with_the_category_and_vendor_at_order_time(self):
+        order_id = self.checkout((self.products[0], 2))
+        before = self.snapshot()
+
+        # المنتج اتنقل لقسم وبائع تانيين بعد الطلب
+        other = User.objects.create_user("other", "other@example.com", "pass")
+        Product.objects.filter(id=self.products[0].id).update(
+            category=Category.objects.create(name="Books"), user=other
+        )
+        rollups.rebuild()
+        self.assertEqual(before, self.snapshot())
+
+        # الإلغاء بيشيل المبيعات من القسم والبائع الأصليين
+        self.client.patch(
+            "/api/orders/bulk-status/", [{"id": order_id, "status": "Cancelled"}], format="json"
+        )
+        self.assertEqual(DailyCategorySales.objects.get().items, 0)
+        self.assertEqual(DailyVendorSales.objects.get(vendor=self.vendor).items, 0)
+        self.assertFalse(DailyVendorSales.objects.filter(vendor=other).exists())
+
+    def test_dashboard_reads_the_window(self):
+        self.checkout((self.products[0], 1))
+        with self.assertNumQueries(6):
+            response = self.client.get("/api/dashboard/stats/?days=30")
+        self.assertEqual(len(response.data["salesChart"]), 30)
+        self.assertEqual(response.data["totalOrders"], 1)
+        self.assertEqual(response.data["topVendors"][0]["vendor_id"], self.vendor.id)
+        self.assertEqual(self.client.get("/api/dashboard/stats/?days=3").status_code, 400)
+
+
+# ---------------------------------------------------------
+# 5. Product search
+# ---------------------------------------------------------
+class ProductSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.laptop = Product.objects.create(
+            name="Laptop pro", brand="Acme", price=900, approval_status="approved"
+        )
+        # أحدث من اللابتوب، والكلمة في الوصف بس
+        self.mouse = Product.objects.create(
+            name="Mouse",
+            description="Works with any laptop",
+            price=20,
+            approval_status="approved",
+        )
+
+    def names(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [product["name"] for product in data["products"]], data
+
+    def test_keyword_results_are_ranked(self):
+        for url in ("/api/products/?keyword=laptop", "/api/products/?keyword=laptop&page=1"):
+            self.assertEqual(self.names(url)[0], ["Laptop pro", "Mouse"])
+
+    def test_ranked_cursor_pages(self):
+        first, data = self.names("/api/products/?keyword=laptop&page_size=1&facets=1")
+        second, data = self.names(data["next"])
+        self.assertEqual((first, second), (["Laptop pro"], ["Mouse"]))
+        self.assertIsNone(data["next"])
+        self.assertEqual(self.names(data["previous"])[0], ["Laptop pro"])
+
+
+# ---------------------------------------------------------
+# 6. Search index sync
+# ---------------------------------------------------------
+class SearchIndexSyncTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Computers")
+        self.tag = Tag.objects.create(name="gaming")
+        self.product = Product.objects.create(
+            name="Laptop", brand="Acme", category=self.category, description="Fast", price=10
+        )
+
+    def indexed(self, product=None):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT name, brand, category, tags, description FROM {search.FTS_TABLE} "
+                "WHERE rowid = %s",
+                [(product or self.product).pk],
+            )
+            return cursor.fetchone()
+
+    def test_product_save_and_delete(self):
+        self.assertEqual(self.indexed(), ("Laptop", "Acme", "Computers", "", "Fast"))
+        self.product.name = "Notebook"
+        self.product.save()
+        self.assertEqual(self.indexed()[0], "Notebook")
+        product_id = self.product.pk
+        self.product.delete()
+        self.product.pk = product_id
+        self.assertIsNone(self.indexed())
+
+    def test_retagging_from_either_side(self):
+        self.product.tags.add(self.tag)
+        self.assertEqual(self.indexed()[3], "gaming")
+        self.product.tags.clear()
+        self.assertEqual(self.indexed()[3], "")
+
+        self.tag.product_set.add(self.product)
+        self.assertEqual(self.indexed()[3], "gaming")
+        self.tag.product_set.remove(self.product)
+        self.assertEqual(self.indexed()[3], "")
+        self.tag.product_set.add(self.product)
+        self.tag.product_set.clear()
+        self.assertEqual(self.indexed()[3], "")
+
+    def test_label_rename_and_delete(self):
+        self.product.tags.add(self.tag)
+        self.category.name = "Laptops"
+        self.category.save()
+        self.tag.name = "office"
+        self.tag.save()
+        self.assertEqual(self.indexed()[2:4], ("Laptops", "office"))
+
+        self.category.delete()
+        self.tag.delete()
+        self.assertEqual(self.indexed()[2:4], ("", ""))
+
+    def test_rebuild_command(self):
+        other = Product.objects.create(name="Mouse", price=10)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.FTS_TABLE}")
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 2 products", out.getvalue())
+        self.assertEqual(self.indexed(other)[0], "Mouse")
+        self.assertEqual(self.indexed()[2], "Computers")
+
+
+# ---------------------------------------------------------
+# 7. Search facets
+# ---------------------------------------------------------
+class FacetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        phones = Category.objects.create(name="Phones")
+        audio = Category.objects.create(name="Audio")
+        wireless = Tag.objects.create(name="wireless")
+        for name, brand, category, price, discount in (
+            ("A", "Apple", phones, 20, None),
+            ("B", "Apple", audio, 60, 40),
+            ("C", "Sony", audio, 30, None),
+            ("D", "Sony", phones, 600, None),
+        ):
+            product = Product.objects.create(
+                name=name,
+                brand=brand,
+                category=category,
+                price=price,
+                discount_price=discount,
+                approval_status="approved",
+            )
+            if category == audio:
+                product.tags.add(wireless)
+
+    def get(self, query):
+        data = self.client.get(f"/api/products/?facets=1&{query}").json()
+        counts = {
+            facet: {
+                str(row.get("name", row["value"])): row["count"] for row in rows if row["count"]
+            }
+            for facet, rows in data["facets"].items()
+        }
+        return sorted(p["name"] for p in data["products"]), counts
+
+    def test_each_facet_ignores_its_own_filter(self):
+        names, facets = self.get("brand=Apple")
+        self.assertEqual(names, ["A", "B"])
+        self.assertEqual(facets["brand"], {"Apple": 2, "Sony": 2})
+        self.assertEqual(facets["category"], {"Phones": 1, "Audio": 1})
+        self.assertEqual(facets["tag"], {"wireless": 1})
+
+        names, facets = self.get("brand=Apple,Sony&tag=wireless")
+        self.assertEqual(names, ["B", "C"])
+        self.assertEqual(facets["brand"], {"Apple": 1, "Sony": 1})
+        self.assertEqual(facets["tag"], {"wireless": 2})
+
+    def test_price_buckets_use_the_effective_price(self):
+        names, facets = self.get("price=25-50")
+        # B: 60 بخصم 40
+        self.assertEqual(names, ["B", "C"])
+        self.assertEqual(facets["price"], {"0-25": 1, "25-50": 2, "500-1000": 1})
+        self.assertEqual(facets["brand"], {"Apple": 1, "Sony": 1})
+
+        names, facets = self.get("price=0-25,500-1000&brand=Sony")
+        self.assertEqual(names, ["D"])
+        self.assertEqual(facets["price"], {"25-50": 1, "500-1000": 1})
+
+
+# ---------------------------------------------------------
+# 8. Typeahead suggestions
+# ---------------------------------------------------------
+class SuggestionIndexTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        suggestions.version = None
+        suggestions.reloading = False
+        suggestions.reloaded_at = None
+        # الـ reload بيشتغل في نفس الـ thread (الـ thread التاني مش شايف الـ transaction بتاع التيست)
+        self.spawned = []
+        spawn = mock.patch.object(suggestions, "_spawn", self.spawn)
+        spawn.start()
+        self.addCleanup(spawn.stop)
+        self.enterContext(self.settings(SUGGEST={**settings.SUGGEST, "RELOAD_INTERVAL": 0}))
+        self.category = Category.objects.create(name="Computers")
+        self.tag = Tag.objects.create(name="gaming")
+        self.laptop = Product.objects.create(
+            name="Gaming Laptop",
+            brand="Acme",
+            category=self.category,
+            price=10,
+            approval_status="approved",
+        )
+
+    def spawn(self, target):
+        self.spawned.append(target)
+        target()
+
+    def suggest(self, q):
+        return self.client.get(f"/api/products/suggest/?q={q}").data
+
+    def snapshot(self, index):
+        counts = {kind: dict(counter) for kind, counter in index.counts.items()}
+        return list(index.keys), dict(index.products), counts
+
+    def assertMatchesReload(self):
+        self.assertIsNotNone(suggestions.version)
+        fresh = SuggestionIndex()
+        fresh._load()
+        self.assertEqual(self.snapshot(suggestions), self.snapshot(fresh))
+
+    def test_incremental_updates_match_a_reload(self):
+        self.assertEqual(
+            self.suggest("lap")["products"], [{"id": self.laptop.id, "name": "Gaming Laptop"}]
+        )
+
+        mouse = Product.objects.create(
+            name="Mouse", brand="Acme", price=5, approval_status="approved"
+        )
+        self.assertMatchesReload()
+        self.laptop.brand = "Zeta"
+        self.laptop.save()
+        self.laptop.tags.add(self.tag)
+        self.assertMatchesReload()
+        mouse.tags.add(self.tag)
+        self.assertMatchesReload()
+        self.assertEqual(self.suggest("ga")["tags"], [{"name": "gaming", "count": 2}])
+        mouse.delete()
+        self.assertMatchesReload()
+
+        data = self.suggest("ga")
+        self.assertEqual([p["name"] for p in data["products"]], ["Gaming Laptop"])
+        self.assertEqual(data["tags"], [{"name": "gaming", "count": 1}])
+        self.assertEqual(self.suggest("ac")["brands"], [])
+
+    def test_label_changes_and_other_processes_reload(self):
+        self.suggest("lap")
+        self.category.name = "Laptops"
+        self.category.save()
+        self.assertNotEqual(suggestions.version, get_catalog_version())
+        self.assertEqual(
+            self.suggest("laptops")["categories"], [{"name": "Laptops", "count": 1}]
+        )
+
+        # retag من ناحية التاج ممكن يلمس منتجات كتير: reload
+        self.tag.product_set.add(self.laptop)
+        self.assertNotEqual(suggestions.version, get_catalog_version())
+        self.assertEqual(self.suggest("gam")["tags"], [{"name": "gaming", "count": 1}])
+
+        # worker تاني كتب في الكتالوج: الـ version اتحرك من غير signals هنا
+        Product.objects.filter(id=self.laptop.id).update(name="Desktop")
+        bump_catalog_version()
+        self.assertEqual([p["name"] for p in self.suggest("desk")["products"]], ["Desktop"])
+
+    def test_stale_index_is_served_while_it_reloads(self):
+        self.suggest("lap")
+        Product.objects.filter(id=self.laptop.id).update(name="Desktop")
+        bump_catalog_version()
+
+        # الـ reload لسه شغال: الطلبات بترجع من الـ index القديم ومفيش reload تاني
+        suggestions.reloading = True
+        self.assertEqual(self.suggest("lap")["products"][0]["name"], "Gaming Laptop")
+        self.assertEqual(self.spawned, [])
+
+        suggestions.reloading = False
+        self.assertEqual([p["name"] for p in self.suggest("desk")["products"]], ["Desktop"])
+        self.assertEqual(len(self.spawned), 1)
+
+        # أقل من RELOAD_INTERVAL من آخر reload: نفضل على الـ index الحالي
+        with self.settings(SUGGEST={**settings.SUGGEST, "RELOAD_INTERVAL": 60}):
+            Product.objects.filter(id=self.laptop.id).update(name="Tablet")
+            bump_catalog_version()
+            self.assertEqual(self.suggest("tab")["products"], [])
+        self.assertEqual(len(self.spawned), 1)
+
+
+# ---------------------------------------------------------
+# 9. Idempotency keys
+# ---------------------------------------------------------
+def checkout_payload(*lines):
+    return {
+        "orderItems": [{"id": product.id, "qty": qty} for product, qty in lines],
+        "paymentMethod": "PayPal",
+        "taxPrice": 0,
+        "shippingPrice": 0,
+        "shippingAddress": {
+            "address": "1 Street",
+            "city": "Cairo",
+            "postalCode": "11511",
+            "country": "Egypt",
+        },
+    }
+
+
+@api_view(["POST"])
+@idempotent
+def failing_view(request):
+    return Response({"detail": "down"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class IdempotencyTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        self.product = Product.objects.create(name="Item", price=10, countInStock=5)
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, qty=1, key="abc"):
+        return self.client.post(
+            "/api/orders/add/",
+            checkout_payload((self.product, qty)),
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.checkout()
+        retry = self.checkout()
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.countInStock, 4)
+
+    def test_key_reused_for_another_request(self):
+        self.checkout(qty=1)
+        self.assertEqual(self.checkout(qty=2).status_code, 422)
+        self.assertEqual(self.checkout(qty=1, key="other").status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_server_errors_are_not_stored(self):
+        request = APIRequestFactory().post("/", {}, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        force_authenticate(request, self.user)
+        self.assertEqual(failing_view(request).status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+# ---------------------------------------------------------
+# 10. Idempotency under concurrency
+# ---------------------------------------------------------
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    def checkout(self, user, product):
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            response = client.post(
+                "/api/orders/add/",
+                checkout_payload((product, 1)),
+                format="json",
+                HTTP_IDEMPOTENCY_KEY="abc",
+            )
+            return response.status_code, response.data["id"]
+        finally:
+            connections.close_all()
+
+    def test_concurrent_duplicates_create_one_order(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        product = Product.objects.create(name="Item", price=10, countInStock=5)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(lambda _: self.checkout(user, product), range(2)))
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][0], 201)
+        self.assertEqual(Order.objects.count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.countInStock, 4)
+
+
+# ---------------------------------------------------------
+# 11. Conditional GETs
+# ---------------------------------------------------------
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches["product_detail"].clear()
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        self.admin = User.objects.create_user(
+            "admin", "admin@example.com", "pass", is_staff=True
+        )
+        self.product = Product.objects.create(name="Item", price=10, countInStock=5)
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_product_detail_revalidates_after_a_review(self):
+        url = f"/api/products/{self.product.id}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotIn("max-age", response["Cache-Control"])
+        etag = response["ETag"]
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            f"/api/products/{self.product.id}/reviews/create/",
+            {"rating": 5, "comment": "Good"},
+            format="json",
+        )
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["numReviews"], 1)
+
+    def test_categories_revalidate_after_a_create(self):
+        url = "/api/categories/"
+        response = self.client.get(url)
+        self.assertIn("no-cache", response["Cache-Control"])
+        etag = response["ETag"]
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        self.client.force_authenticate(self.admin)
+        self.client.post("/api/categories/create/", {"name": "Tech"}, format="json")
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c["name"] for c in response.json()], ["Tech"])
+
+    def test_tags_revalidate_after_a_product_creates_one(self):
+        url = "/api/tags/"
+        etag = self.client.get(url)["ETag"]
+
+        # التاج الجديد بيتعمل بـ bulk_create (من غير post_save)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/products/create/",
+                {"name": "New", "price": "5", "countInStock": 1, "tags": '["brandnew"]'},
+                format="multipart",
+            )
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t["name"] for t in response.json()], ["brandnew"])
+
+
+# ---------------------------------------------------------
+# 12. Order status transitions
+# ---------------------------------------------------------
+class OrderStatusTests(APITestCase):
+    def setUp(self):
+        self.vendor = User.objects.create_user("vendor", "vendor@example.com", "pass")
+        self.vendor.profile.type = "vendor"
+        self.vendor.profile.save()
+        self.admin = User.objects.create_user(
+            "admin", "admin@example.com", "pass", is_staff=True
+        )
+        self.product = Product.objects.create(
+            user=self.vendor, name="Item", price=10, countInStock=10
+        )
+        self.client.force_authenticate(self.admin)
+
+    def checkout(self, qty=1):
+        response = self.client.post(
+            "/api/orders/add/", checkout_payload((self.product, qty)), format="json"
+        )
+        return response.data["id"]
+
+    def bulk(self, *changes):
+        response = self.client.patch(
+            "/api/orders/bulk-status/",
+            [{"id": order_id, "status": target} for order_id, target in changes],
+            format="json",
+        )
+        return response.data["updated"], {
+            r["id"]: (r["status"], r.get("from")) for r in response.data["results"]
+        }
+
+    def test_allowed_and_invalid_transitions(self):
+        shipped, pending, delivered, fresh = (self.checkout() for _ in range(4))
+        self.bulk((shipped, "Shipped"), (delivered, "Delivered"))
+
+        updated, results = self.bulk(
+            (shipped, "Delivered"),
+            (pending, "Pending"),
+            (delivered, "Cancelled"),
+            (fresh, "Processing"),
+            (999, "Shipped"),
+        )
+        self.assertEqual(updated, 2)
+        self.assertEqual(results[shipped], ("updated", "Shipped"))
+        self.assertEqual(results[pending], ("unchanged", "Pending"))
+        self.assertEqual(results[delivered], ("invalid_transition", "Delivered"))
+        self.assertEqual(results[fresh], ("updated", "Pending"))
+        self.assertEqual(results[999], ("not_found", None))
+        self.assertEqual(Order.objects.get(id=fresh).status, "Processing")
+
+    def test_delivered_flags_follow_the_status(self):
+        by_bulk, by_button = self.checkout(), self.checkout()
+        self.bulk((by_bulk, "Delivered"))
+        self.assertEqual(self.client.put(f"/api/orders/{by_button}/deliver/").status_code, 200)
+        for order in Order.objects.all():
+            self.assertEqual(order.status, "Delivered")
+            self.assertTrue(order.isDelivered)
+            self.assertIsNotNone(order.deliveredAt)
+        self.assertEqual(self.client.put(f"/api/orders/{by_button}/deliver/").status_code, 200)
+        _, results = self.bulk((by_bulk, "Shipped"))
+        self.assertEqual(results[by_bulk][0], "invalid_transition")
+
+    def test_order_moved_by_another_request_is_a_conflict(self):
+        first, second = self.checkout(), self.checkout()
+        move = orders._move
+
+        def racing_move(queryset, target, now):
+            # طلب تاني لغى الطلب التاني بين الـ SELECT والـ UPDATE
+            Order.objects.filter(id=second).update(status="Cancelled")
+            return move(queryset, target, now)
+
+        with mock.patch.object(orders, "_move", racing_move):
+            updated, results = self.bulk((first, "Shipped"), (second, "Shipped"))
+        self.assertEqual(updated, 1)
+        self.assertEqual(results[first], ("updated", "Pending"))
+        self.assertEqual(results[second], ("conflict", "Pending"))
+
+    def test_cancelling_restocks_and_leaves_the_sales(self):
+        self.checkout(qty=3)
+        cancelled = self.checkout(qty=2)
+        self.client.put(f"/api/orders/{cancelled}/pay/")
+        with self.captureOnCommitCallbacks(execute=True):
+            updated, _ = self.bulk((cancelled, "Cancelled"))
+        self.assertEqual(updated, 1)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.countInStock, 7)
+        day = DailySales.objects.get()
+        self.assertEqual((day.orders, day.items, day.sales, day.paidOrders), (1, 3, 30, 0))
+
+        # مفيش رجوع: الإلغاء التاني ما يرجعش المخزون تاني
+        self.assertEqual(self.bulk((cancelled, "Cancelled"))[0], 0)
+        self.client.put(f"/api/orders/{cancelled}/pay/")
+        self.client.delete(f"/api/orders/delete/{cancelled}/")
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.countInStock, 7)
+
+        incremental = list(DailySales.objects.values_list("orders", "sales", "items", "paidSales"))
+        incremental += list(DailyVendorSales.objects.values_list("orders", "sales", "items"))
+        rollups.rebuild()
+        rebuilt = list(DailySales.objects.values_list("orders", "sales", "items", "paidSales"))
+        rebuilt += list(DailyVendorSales.objects.values_list("orders", "sales", "items"))
+        self.assertEqual(incremental, rebuilt)
+
+        # الداشبورد وإحصائيات البائع بيحسبوا نفس المبيعات
+        dashboard = self.client.get("/api/dashboard/stats/?days=7").data
+        self.client.force_authenticate(self.vendor)
+        analytics = self.client.get("/api/users/seller/analytics/?days=7").data
+        self.assertEqual(dashboard["totalSales"], analytics["summary"]["revenue"])
+        self.assertEqual(dashboard["topVendors"][0]["sales"], 30)
+
+    def test_cancelled_orders_cannot_be_paid(self):
+        cancelled = self.checkout()
+        self.bulk((cancelled, "Cancelled"))
+        response = self.client.put(f"/api/orders/{cancelled}/pay/")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.get(id=cancelled).isPaid)
+        self.assertEqual(DailySales.objects.get().paidOrders, 0)
+
+
+# ---------------------------------------------------------
+# 13. Rating aggregates
+# ---------------------------------------------------------
+class RatingAggregateTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Item", price=10, approval_status="approved")
+        self.users = [
+            User.objects.create_user(f"user{i}", f"user{i}@example.com", "pass") for i in range(3)
+        ]
+
+    def review(self, user, rating, action="create", method="post"):
+        self.client.force_authenticate(user)
+        response = getattr(self.client, method)(
+            f"/api/products/{self.product.id}/reviews/{action}/",
+            {"rating": rating, "comment": "..."},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def assertMatchesReconcile(self, num_reviews, rating):
+        self.product.refresh_from_db()
+        self.assertEqual(
+            (self.product.numReviews, self.product.rating), (num_reviews, Decimal(rating))
+        )
+        self.assertEqual(ratings.reconcile(), 0)
+
+    def test_incremental_updates_match_reconcile(self):
+        for user, rating in zip(self.users, (5, 4, 3)):
+            self.review(user, rating)
+        self.assertMatchesReconcile(3, "4")
+
+        self.review(self.users[2], 1, action="update", method="put")
+        self.assertMatchesReconcile(3, "3.33")
+
+        # حذف من الأدمن أو الـ shell (من غير الـ views)
+        Review.objects.get(user=self.users[0]).delete()
+        self.assertMatchesReconcile(2, "2.5")
+        Review.objects.filter(user__in=self.users[1:]).delete()
+        self.assertMatchesReconcile(0, "0")
+        self.assertEqual(self.product.stars4, 0)
+
+    def test_ranking_and_caches_follow_the_commit(self):
+        def score():
+            return ProductRanking.objects.get(product=self.product).score
+
+        before = score()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.review(self.users[0], 5)
+        # قبل الـ commit الترتيب لسه ما اتحدثش
+        self.assertEqual(score(), before)
+        version = get_catalog_version()
+        for callback in callbacks:
+            callback()
+        self.assertGreater(score(), before)
+        self.assertGreater(get_catalog_version(), version)
+
+    def test_invalid_and_legacy_ratings(self):
+        self.client.force_authenticate(self.users[0])
+        url = f"/api/products/{self.product.id}/reviews/create/"
+        for rating in (0, 6, 4.5, "4.5", True, None, "x"):
+            response = self.client.post(url, {"rating": rating, "comment": "..."}, format="json")
+            self.assertEqual(response.status_code, 400, rating)
+
+        # ريفيو قديم بتقييم 0 (قبل الـ validation): التعديل والحذف ما يوقعوش
+        Review.objects.create(product=self.product, user=self.users[0], rating=0)
+        Review.objects.create(product=self.product, user=self.users[1], rating=0)
+        ratings.reconcile()
+        self.review(self.users[0], 3, action="update", method="put")
+        self.assertMatchesReconcile(2, "1.5")
+        Review.objects.get(user=self.users[1]).delete()
+        self.assertMatchesReconcile(1, "3")
+
+    def test_product_edit_keeps_the_aggregates(self):
+        self.product.user = self.users[0]
+        self.product.save()
+
+        def review_meanwhile(product, names):
+            # ريفيو وصل بعد ما الـ view قرا المنتج وقبل الـ save
+            Review.objects.create(product=product, user=self.users[1], rating=4)
+            ratings.review_added(product.id, 4)
+
+        self.client.force_authenticate(self.users[0])
+        with mock.patch("store.views.sync_tags", review_meanwhile):
+            response = self.client.put(
+                f"/api/products/update/{self.product.id}/",
+                {"name": "Renamed", "tags": "[]"},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, "Renamed")
+        self.assertMatchesReconcile(1, "4")
+
+    def test_deleting_a_reviewed_product(self):
+        self.review(self.users[0], 5)
+        self.product.delete()
+        self.assertFalse(Review.objects.exists())
+        self.assertFalse(ProductRanking.objects.exists())
+
+
+# ---------------------------------------------------------
+# 14. Seller orders and analytics
+# ---------------------------------------------------------
+class SellerTests(APITestCase):
+    def setUp(self):
+        self.vendors = []
+        for name in ("vendor_a", "vendor_b"):
+            vendor = User.objects.create_user(name, f"{name}@example.com", "pass")
+            vendor.profile.type = "vendor"
+            vendor.profile.save()
+            self.vendors.append(vendor)
+        self.buyer = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        self.mine = Product.objects.create(
+            user=self.vendors[0], name="Mine", price=10, countInStock=50
+        )
+        self.theirs = Product.objects.create(
+            user=self.vendors[1], name="Theirs", price=7, countInStock=50
+        )
+
+    def checkout(self, *lines):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post("/api/orders/add/", checkout_payload(*lines), format="json")
+        return response.data["id"]
+
+    def test_seller_orders_only_count_the_vendors_lines(self):
+        shared = self.checkout((self.mine, 2), (self.theirs, 3))
+        self.checkout((self.theirs, 1))
+        own = self.checkout((self.mine, 1))
+
+        self.client.force_authenticate(self.vendors[0])
+        response = self.client.get("/api/users/seller/orders/?page_size=1")
+        self.assertEqual([o["order_id"] for o in response.data["orders"]], [own])
+        response = self.client.get(response.data["next"])
+        self.assertIsNone(response.data["next"])
+
+        order = response.data["orders"][0]
+        self.assertEqual(order["order_id"], shared)
+        self.assertEqual((order["qty"], order["totalPrice"]), (2, 20))
+        self.assertEqual([item["name"] for item in order["items"]], ["Mine"])
+    def analytics(self):
+        self.client.force_authenticate(self.vendors[0])
+        return self.client.get("/api/users/seller/analytics/?days=7").data["summary"]
+
+    def test_analytics_cache_follows_orders_and_reviews(self):
+        self.assertEqual(self.analytics()["revenue"], 0)
+
+        # طلب لبائع تاني بس: الكاش بتاعنا ما يتلمسش
+        version = get_version(f"vendor:{self.vendors[0].id}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.checkout((self.theirs, 1))
+        self.assertEqual(get_version(f"vendor:{self.vendors[0].id}"), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.checkout((self.mine, 2), (self.theirs, 1))
+        summary = self.analytics()
+        self.assertEqual((summary["revenue"], summary["units"], summary["orders"]), (20, 2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/products/{self.mine.id}/reviews/create/",
+                {"rating": 4, "comment": "Good"},
+                format="json",
+            )
+        summary = self.analytics()
+        self.assertEqual((summary["rating"], summary["numReviews"]), (4, 1))
+
+
+# ---------------------------------------------------------
+# 15. Bulk product import
+# ---------------------------------------------------------
+class ProductImportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            "admin", "admin@example.com", "pass", is_staff=True
+        )
+        Category.objects.create(name="Computers")
+        Tag.objects.create(name="gaming")
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            "/api/products/import/",
+            {"file": SimpleUploadedFile(name, content.encode()), **data},
+            format="multipart",
+        )
+
+    def test_csv_rows_and_their_errors(self):
+        response = self.upload(
+            "products.csv",
+            "name,price,category,tags,countInStock\n"
+            "Laptop,999.50,Computers,gaming|new,3\n"
+            ",10,,,\n"
+            "Mouse,cheap,,,\n"
+            "Phone,300,Phones,,\n"
+            "Cable,5,,,-1\n",
+            approval_status="approved",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 4))
+        self.assertEqual(
+            [(e["row"], sorted(e["errors"])) for e in response.data["errors"]],
+            [(2, ["name"]), (3, ["price"]), (5, ["countInStock"]), (4, ["category"])],
+        )
+
+        laptop = Product.objects.get()
+        self.assertEqual((laptop.price, laptop.countInStock), (Decimal("999.50"), 3))
+        self.assertEqual(laptop.category.name, "Computers")
+        self.assertEqual(sorted(laptop.tags.values_list("name", flat=True)), ["gaming", "new"])
+        self.assertEqual(Tag.objects.count(), 2)
+
+        # bulk_create من غير signals: الـ index والترتيب اتحدثوا يدوي
+        found = self.client.get("/api/products/?keyword=gaming").json()["products"]
+        self.assertEqual([p["name"] for p in found], ["Laptop"])
+        self.assertTrue(ProductRanking.objects.filter(product=laptop).exists())
+
+    def test_jsonl_rows_and_their_errors(self):
+        lines = [
+            json.dumps({"name": "Keyboard", "price": 40, "tags": ["gaming"]}),
+            "not json",
+            "",
+            json.dumps(["a", "list"]),
+            json.dumps({"name": "Monitor", "price": "150", "category": "Computers"}),
+        ]
+        response = self.upload("products.jsonl", "\n".join(lines))
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 2))
+        self.assertEqual([e["row"] for e in response.data["errors"]], [2, 3])
+
+        keyboard = Product.objects.get(name="Keyboard")
+        self.assertEqual(keyboard.approval_status, "pending")
+        self.assertEqual(list(keyboard.tags.values_list("name", flat=True)), ["gaming"])
+        self.assertFalse(ProductRanking.objects.exists())
+        self.assertEqual(
+            [row.name for row in search.search_products(Product.objects.all(), "monitor")],
+            ["Monitor"],
+        )
+
+    def test_new_tags_change_the_tags_etag(self):
+        etag = self.client.get("/api/tags/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload("products.csv", "name,price,tags\nLaptop,10,gaming|brandnew\n")
+        response = self.client.get("/api/tags/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(t["name"] for t in response.json()), ["brandnew", "gaming"])
+
+    def test_batches(self):
+        rows = [{"name": f"P{i}", "price": "1"} for i in range(5)] + [{"price": "1"}]
+        report = importers.import_products(rows, self.admin, batch_size=2)
+        self.assertEqual((report["created"], report["failed"]), (5, 1))
+        self.assertEqual(report["errors"][0]["row"], 6)
+        self.assertEqual(search.search_products(Product.objects.all(), "p4").count(), 1)
+
+
+# ---------------------------------------------------------
+# 16. Bulk product updates
+# ---------------------------------------------------------
+class BulkProductUpdateTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches["product_detail"].clear()
+        self.vendor = User.objects.create_user("vendor", "vendor@example.com", "pass")
+        self.other = User.objects.create_user("other", "other@example.com", "pass")
+        self.mine = Product.objects.create(
+            user=self.vendor, name="Mine", price=10, countInStock=1
+        )
+        self.theirs = Product.objects.create(user=self.other, name="Theirs", price=10)
+
+    def patch(self, user, items):
+        self.client.force_authenticate(user)
+        response = self.client.patch("/api/products/bulk-update/", items, format="json")
+        self.assertEqual(response.status_code, 200)
+        results = [(r["id"], r["status"]) for r in response.data["results"]]
+        return response.data["updated"], results
+
+    def test_ownership_duplicates_and_invalid_items(self):
+        # الكاش فيه النسخة القديمة قبل التعديل
+        self.client.get(f"/api/products/{self.mine.id}/")
+        updated, results = self.patch(
+            self.vendor,
+            [
+                {"id": self.mine.id, "price": "12.50", "countInStock": 7},
+                {"id": self.theirs.id, "price": "1"},
+                {"id": self.mine.id, "price": "99"},
+                {"id": 999, "countInStock": 1},
+                {"id": self.mine.id},
+                {"id": self.theirs.id, "price": "-1"},
+                "not an object",
+            ],
+        )
+        self.assertEqual(updated, 1)
+        self.assertEqual(
+            results,
+            [
+                (self.mine.id, "updated"),
+                (self.theirs.id, "not_authorized"),
+                (self.mine.id, "duplicate"),
+                (999, "not_found"),
+                (self.mine.id, "invalid"),
+                (self.theirs.id, "invalid"),
+                (None, "invalid"),
+            ],
+        )
+
+        self.mine.refresh_from_db()
+        self.theirs.refresh_from_db()
+        self.assertEqual((self.mine.price, self.mine.countInStock), (Decimal("12.50"), 7))
+        self.assertEqual(self.theirs.price, 10)
+        detail = self.client.get(f"/api/products/{self.mine.id}/").json()
+        self.assertEqual(detail["price"], "12.50")
+
+    def test_admin_updates_any_product(self):
+        admin = User.objects.create_user(
+            "admin", "admin@example.com", "pass", is_staff=True
+        )
+        updated, _ = self.patch(
+            admin,
+            [
+                {"id": self.mine.id, "discount_price": None},
+                {"id": self.theirs.id, "countInStock": 4},
+            ],
+        )
+        self.assertEqual(updated, 2)
+        self.theirs.refresh_from_db()
+        self.assertEqual(self.theirs.countInStock, 4)
+
+
+# ---------------------------------------------------------
+# 17. Review pages
+# ---------------------------------------------------------
+class ReviewPageTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Item", price=10)
+        for i, rating in enumerate((5, 3, 5, 1, 4)):
+            user = User.objects.create_user(f"user{i}", f"user{i}@example.com", "pass")
+            self.client.force_authenticate(user)
+            self.client.post(
+                f"/api/products/{self.product.id}/reviews/create/",
+                {"rating": rating, "comment": f"review {i}"},
+                format="json",
+            )
+        self.client.force_authenticate(None)
+
+    def walk(self, query):
+        url = f"/api/products/{self.product.id}/reviews/?page_size=2&{query}"
+        pages = []
+        while url:
+            data = self.client.get(url).data
+            pages.append([r["comment"][-1] for r in data["reviews"]])
+            url = data["next"]
+        return pages, data
+
+    def test_sorted_pages(self):
+        pages, last = self.walk("sort=highest")
+        # نفس النجوم: الأحدث الأول
+        self.assertEqual(pages, [["2", "0"], ["4", "1"], ["3"]])
+        self.assertEqual(last["rating_histogram"]["5"], 2)
+        previous = self.client.get(last["previous"]).data
+        self.assertEqual([r["comment"][-1] for r in previous["reviews"]], ["4", "1"])
+
+        self.assertEqual(self.walk("")[0], [["4", "3"], ["2", "1"], ["0"]])
+
+    def test_star_filter(self):
+        self.assertEqual(self.walk("sort=lowest&rating=4,5")[0], [["4", "2"], ["0"]])
+        self.assertEqual(self.walk("rating=1")[0], [["3"]])
+
+    def test_bad_parameters(self):
+        url = f"/api/products/{self.product.id}/reviews/"
+        self.assertEqual(self.client.get(url + "?sort=oldest").status_code, 400)
+        self.assertEqual(self.client.get(url + "?cursor=nope").status_code, 400)
+        self.assertEqual(self.client.get("/api/products/999/reviews/").status_code, 404)
+
+
+# ---------------------------------------------------------
+# 18. Order export
+# ---------------------------------------------------------
+class OrderExportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            "admin", "admin@example.com", "pass", first_name="Admin", is_staff=True
+        )
+        self.products = [
+            Product.objects.create(name=f"P{i}", price=10 * (i + 1), countInStock=10)
+            for i in range(2)
+        ]
+        self.client.force_authenticate(self.admin)
+        self.paid = self.checkout((self.products[0], 2), (self.products[1], 1))
+        self.unpaid = self.checkout((self.products[1], 3))
+        self.client.put(f"/api/orders/{self.paid}/pay/")
+
+    def checkout(self, *lines):
+        response = self.client.post("/api/orders/add/", checkout_payload(*lines), format="json")
+        return response.data["id"]
+
+    def export(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            chunks = [chunk.decode() for chunk in response.streaming_content]
+        return response, chunks
+
+    def test_csv_orders_with_filters(self):
+        response, chunks = self.export("/api/orders/export/csv/?isPaid=true")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="orders_report.csv"', response["Content-Disposition"])
+        # الـ header لوحده في أول جزء، قبل ما الـ query تشتغل
+        self.assertEqual(
+            chunks[0].strip(), ",".join(column.header for column in exporters.ORDER_COLUMNS)
+        )
+
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+        self.assertEqual([row["Order ID"] for row in rows], [str(self.paid)])
+        self.assertEqual((rows[0]["Paid?"], rows[0]["Delivered?"]), ("Yes", "No"))
+        self.assertEqual((rows[0]["Customer"], rows[0]["City"]), ("Admin", "Cairo"))
+        self.assertEqual(rows[0]["Total Price"], "40.00")
+        # نفس شكل التقرير القديم: التاريخ من غير وقت
+        order = Order.objects.get(id=self.paid)
+        self.assertEqual(rows[0]["Date"], order.createdAt.strftime("%Y-%m-%d"))
+
+    def test_csv_keeps_the_old_customer_column(self):
+        self.admin.first_name = ""
+        self.admin.save()
+        Order.objects.filter(id=self.unpaid).update(user=None)
+        _, chunks = self.export("/api/orders/export/csv/?items=1")
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+        self.assertEqual({row["Customer"] for row in rows}, {"", "Guest"})
+
+        # الـ JSONL بيرجع الإيميل لو مفيش اسم
+        _, chunks = self.export("/api/orders/export/jsonl/")
+        lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual({line["customer"] for line in lines}, {"admin@example.com", "Guest"})
+
+    def test_jsonl_order_lines(self):
+        response, chunks = self.export("/api/orders/export/jsonl/?items=1&status=Pending")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="order_items_report.jsonl"', response["Content-Disposition"])
+
+        lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual(json.loads(chunks[0]), lines[0])
+        self.assertEqual(
+            [(line["order"], line["name"], line["qty"], line["total"]) for line in lines],
+            [
+                (self.unpaid, "P1", 3, "60.00"),
+                (self.paid, "P0", 2, "20.00"),
+                (self.paid, "P1", 1, "20.00"),
+            ],
+        )
+        self.assertIs(lines[-1]["isPaid"], True)
+
+        response = self.client.get("/api/orders/export/jsonl/?date_from=May")
+        self.assertEqual(response.status_code, 400)
+
+
+# ---------------------------------------------------------
+# 19. Wishlist
+# ---------------------------------------------------------
+class WishlistToggleTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass")
+        self.product = Product.objects.create(name="Item", price=10)
+        self.client.force_authenticate(self.user)
+
+    def toggle(self):
+        response = self.client.post(
+            "/api/wishlist/toggle/", {"product_id": self.product.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data["status"]
+
+    def test_toggle(self):
+        self.assertEqual(self.toggle(), "added")
+        self.assertEqual(self.toggle(), "removed")
+        self.assertFalse(WishlistItem.objects.exists())
+
+    def test_double_click_adds_once(self):
+        create = WishlistItem.objects.get_or_create
+
+        def racing_create(**kwargs):
+            # الضغطة التانية ضافت المنتج بين الـ DELETE والـ INSERT
+            WishlistItem.objects.create(**kwargs)
+            return create(**kwargs)
+
+        with mock.patch.object(WishlistItem.objects, "get_or_create", racing_create):
+            self.assertEqual(self.toggle(), "added")
+        self.assertEqual(WishlistItem.objects.count(), 1)
@@ -8,15 +8,19 @@ urlpatterns = [
     path("products/", views.getProducts, name="products"),
     path("products/top/", views.getTopProducts, name="top-products"),
     path("products/shop-view/", views.getProductsByCategory, name="shop-view"),
+    path("products/suggest/", views.getSuggestions, name="product-suggest"),
     # -------------------------
     # 1.1. Product Creation & User's Products
     # -------------------------
     path("products/create/", views.createProduct, name="product-create"),
+    path("products/import/", views.importProducts, name="product-import"),
+    path("products/bulk-update/", views.bulkUpdateProducts, name="product-bulk-update"),
     path("products/myproducts/", views.getMyProducts, name="my-products"),
     # -------------------------
     # 2. Product Details
     # -------------------------
     path("products/<str:pk>/", views.getProduct, name="product-detail"),
+    path("products/<str:pk>/reviews/", views.getProductReviews, name="product-reviews"),
     path(
         "products/<str:pk>/reviews/create/",
         views.createProductReview,
@@ -47,6 +51,7 @@ urlpatterns = [
     path("orders/add/", views.addOrderItems, name="orders-add"),
     path("orders/", views.getOrders, name="orders"),
     path("orders/myorders/", views.getMyOrders, name="myorders"),
+    path("orders/bulk-status/", views.bulkUpdateOrderStatus, name="orders-bulk-status"),
     path("orders/<str:pk>/", views.getOrderById, name="user-order"),
     path("orders/<str:pk>/pay/", views.updateOrderToPaid, name="pay"),
     path(
@@ -66,10 +71,12 @@ urlpatterns = [
     # 7. Admin Categories
     # -------------------------
     path("dashboard/stats/", views.getDashboardStats, name="dashboard-stats"),
+    path("dashboard/cache-stats/", views.getCacheStats, name="cache-stats"),
     path("categories/create/", views.createCategory, name="category-create"),
     path("categories/update/<str:pk>/", views.updateCategory, name="category-update"),
     path("categories/delete/<str:pk>/", views.deleteCategory, name="category-delete"),
     path("orders/export/csv/", views.exportOrdersCSV, name="export-csv"),
+    path("orders/export/jsonl/", views.exportOrdersJSONL, name="export-jsonl"),
     path("tags/", views.getTags, name="tags"),
     path("tags/create/", views.createTag, name="tag-create"),
     path("tags/update/<str:pk>/", views.updateTag, name="tag-update"),
@@ -6,49 +6,84 @@ from rest_framework import status
 
 from .models import *
 from rest_framework.parsers import MultiPartParser, FormParser
-from datetime import datetime
 
 from .serializers import *
+from .search import RANKED_ORDERING, search_products
+from .pagination import paginate_by_cursor, encode_cursor, get_page_size, InvalidCursor
+from .cache import (
+    bump_catalog_version,
+    cache_catalog_response,
+    cache_control_headers,
+    get_product_detail,
+    get_version,
+    invalidate_product_details,
+    product_detail_stats,
+)
+from rest_framework.renderers import JSONRenderer
+from .leaderboard import top_product_ids
+from .facets import apply_filters, get_facets, parse_filters
+from .suggest import suggestions
+from .tags import sync_tags
+from .orders import apply_transitions, filter_orders, parse_bool
+from .idempotency import idempotent
+from . import exporters, importers, ratings, rollups
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Count, Window
+from django.db.models.functions import RowNumber
+from django.conf import settings
+from urllib.parse import urlencode
+from itertools import groupby
+from operator import attrgetter
 
-from django.db.models import Sum
-from datetime import timedelta
 from django.utils import timezone
 
 import csv
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import condition
 import json
 
 # views for Products
 
 
 @api_view(["GET"])
+@cache_catalog_response
 def getProducts(request):
-    query = request.query_params.get("keyword")
-    category_id = request.query_params.get("category")
+    filters = parse_filters(request)
 
-    if query == None:
-        query = ""
+    # 1. البحث (من الـ search index، والأقرب للكلمة الأول)
+    products = search_products(Product.objects.order_by("-createdAt"), filters["keyword"])
 
-    # 1. البحث
-    products = Product.objects.filter(
-        Q(name__icontains=query)
-        | Q(description__icontains=query)
-        | Q(brand__icontains=query)
-        | Q(category__name__icontains=query)
-    ).order_by("-createdAt")
-
-    # 2. فلتر القسم
-    if category_id:
-        products = products.filter(category__id=category_id)
-
-    # 👇👇 3. التعديل الجذري: فلترة "الموافق عليه" لغير الأدمن 👇👇
+    # 👇👇 2. التعديل الجذري: فلترة "الموافق عليه" لغير الأدمن 👇👇
     if not request.user.is_staff:
         products = products.filter(approval_status="approved")
 
-    # 4. الـ Pagination (بيتم بعد الفلترة، فبيكون العدد مظبوط)
+    # 3. الفلاتر: القسم والماركة والتاج والسعر (كل واحد يقبل أكتر من قيمة)
+    facets = None
+    if request.query_params.get("facets"):
+        facets = get_facets(products, filters, staff=request.user.is_staff)
+
+    fields = requested_product_fields(request)
+    products = apply_filters(products, filters)
+    products = ProductSerializer.setup_eager_loading(products, fields=fields)
+
+    # 4. الـ Pagination: الافتراضي cursor (من غير COUNT ولا OFFSET)
+    # والعملاء القدام اللي بيبعتوا ?page= بيرجعلهم نفس الشكل القديم
     page = request.query_params.get("page")
+    if page is None:
+        # مع البحث الترتيب بالأقرب للكلمة، غير كده بالأحدث
+        ranked = "search_rank" in products.query.annotations
+        ordering = RANKED_ORDERING if ranked else ("-createdAt", "-id")
+        try:
+            rows, next_url, prev_url = paginate_by_cursor(request, products, ordering=ordering)
+        except InvalidCursor as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = ProductSerializer(rows, many=True, fields=fields)
+        data = {"products": serializer.data, "next": next_url, "previous": prev_url}
+        if facets is not None:
+            data["facets"] = facets
+        return Response(data)
+
     paginator = Paginator(products, 8)
 
     try:
@@ -62,27 +97,75 @@ def getProducts(request):
         page = 1
 
     page = int(page)
-    serializer = ProductSerializer(products, many=True)
-    return Response(
-        {"products": serializer.data, "page": page, "pages": paginator.num_pages}
-    )
+    serializer = ProductSerializer(products, many=True, fields=fields)
+    data = {"products": serializer.data, "page": page, "pages": paginator.num_pages}
+    if facets is not None:
+        data["facets"] = facets
+    return Response(data)
+
+
+# views for Search Suggestions (typeahead)
+@api_view(["GET"])
+def getSuggestions(request):
+    # من index في الذاكرة، من غير ما نلمس الداتابيز في أغلب الطلبات
+    try:
+        limit = int(request.query_params.get("limit", settings.SUGGEST["LIMIT"]))
+    except ValueError:
+        limit = settings.SUGGEST["LIMIT"]
+    limit = max(1, min(limit, settings.SUGGEST["MAX_LIMIT"]))
+    return Response(suggestions.suggest(request.query_params.get("q", ""), limit))
+
+
+# Conditional GETs: الـ ETag بيتحسب من lookup واحد رخيص، من غير serialization
+def _product_updated_at(request, pk):
+    if not hasattr(request, "_product_updated_at"):
+        request._product_updated_at = (
+            Product.objects.filter(id=pk).values_list("updatedAt", flat=True).first()
+            if str(pk).isdigit()
+            else None
+        )
+    return request._product_updated_at
+
+
+def _product_etag(request, pk):
+    updated_at = _product_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return f'"product-{pk}-{updated_at.timestamp()}"'
 
 
 # views for Product Details
+# no-cache: المتصفح لازم يسأل كل مرة (بالـ ETag) عشان يشوف تعديلاته على طول،
+# و private عشان الطلبات دي بيبقى معاها Authorization
 @api_view(["GET"])
+@cache_control_headers(private=True, no_cache=True)
+@condition(etag_func=_product_etag, last_modified_func=_product_updated_at)
 def getProduct(request, pk):
+    updated_at = _product_updated_at(request, pk)
+    if updated_at is None:
+        return Response(
+            {"detail": "Product not found"}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    # الـ payload الكامل متخزن في الكاش، وبيتمسح مع أي تغيير في المنتج
+    def build():
+        product = ProductSerializer.setup_eager_loading(Product.objects).get(id=pk)
+        return JSONRenderer().render(ProductSerializer(product, many=False).data)
+
     try:
-        product = Product.objects.get(id=pk)
-        serializer = ProductSerializer(product, many=False)
-        return Response(serializer.data)
+        content = get_product_detail(pk, updated_at, build)
     except Product.DoesNotExist:
         return Response(
             {"detail": "Product not found"}, status=status.HTTP_404_NOT_FOUND
         )
+    return HttpResponse(content, content_type="application/json")
 
 
 # views for Categories
 @api_view(["GET"])
+@cache_control_headers(public=True, no_cache=True)
+@condition(etag_func=lambda request: f'"categories-{get_version("categories")}"')
+@cache_catalog_response
 def getCategories(request):
     categories = Category.objects.all()
     serializer = CategorySerializer(categories, many=True)
@@ -94,8 +177,11 @@ def getCategories(request):
 @permission_classes([IsAuthenticated])
 def getMyProducts(request):
     user = request.user
-    products = user.product_set.all()
-    serializer = ProductSerializer(products, many=True)
+    fields = requested_product_fields(request)
+    products = ProductSerializer.setup_eager_loading(
+        user.product_set.all(), fields=fields
+    )
+    serializer = ProductSerializer(products, many=True, fields=fields)
     return Response(serializer.data)
 
 
@@ -142,19 +228,48 @@ def createProduct(request):
         # التأكد من أن البيانات نصية (JSON String)
         if isinstance(tags_data, str):
             try:
-                tags_list = json.loads(tags_data)
-                for tag_name in tags_list:
-                    # تنظيف النص وإنشاء التاج أو جلبه
-                    tag, created = Tag.objects.get_or_create(name=tag_name.strip())
-                    product.tags.add(tag)
+                # تنظيف النص وإنشاء التاجز الناقصة مرة واحدة
+                sync_tags(product, json.loads(tags_data))
             except json.JSONDecodeError:
                 print("Error decoding tags JSON in Create")
 
-    product.save()
+    # update_fields: الـ save ما يكتبش فوق إحصائيات التقييم (بتتحدث بالـ F())
+    product.save(update_fields=["image", "updatedAt"])
     serializer = ProductSerializer(product, many=False)
     return Response(serializer.data)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def importProducts(request):
+    # رفع ملف CSV / JSONL فيه منتجات كتير مرة واحدة
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"detail": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
+
+    status_value = "pending"
+    if request.user.is_staff:
+        status_value = request.data.get("approval_status", "pending")
+    if status_value not in dict(Product.APPROVAL_CHOICES):
+        return Response(
+            {"detail": "Invalid approval_status"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        fmt = importers.detect_format(upload.name, request.data.get("format"))
+        report = importers.import_products(
+            importers.iter_rows(upload, fmt), request.user, approval_status=status_value
+        )
+    except importers.ImportFormatError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return Response(
+            {"detail": f"Could not read the file: {e}"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(report)
+
+
 @api_view(["PUT"])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
@@ -162,22 +277,25 @@ def updateProduct(request, pk):
     product = Product.objects.get(id=pk)
     data = request.data
 
-    # 1. تحديث البيانات النصية
-    product.name = data.get("name", product.name)
-    product.price = data.get("price", product.price)
-    product.brand = data.get("brand", product.brand)
-    product.countInStock = data.get("countInStock", product.countInStock)
-    product.description = data.get("description", product.description)
-    
-    if request.user.is_staff:
-        product.approval_status = data.get("approval_status", product.approval_status)
+    # 1. تحديث البيانات النصية (اللي اتبعت بس)
+    changed = [
+        field
+        for field in ("name", "price", "brand", "countInStock", "description")
+        if field in data
+    ]
+    if request.user.is_staff and "approval_status" in data:
+        changed.append("approval_status")
+    for field in changed:
+        setattr(product, field, data.get(field))
 
     if data.get("category"):
         product.category_id = data.get("category")
+        changed.append("category")
 
     # 2. تحديث الصورة الرئيسية
     if request.FILES.get("image"):
         product.image = request.FILES.get("image")
+        changed.append("image")
 
     # ---------------------------------------------------
     # 3. حل مشكلة الصور الفرعية في التعديل (إضافة صور جديدة) ✅
@@ -194,19 +312,80 @@ def updateProduct(request, pk):
         tags_data = data["tags"]
         if isinstance(tags_data, str):
             try:
-                tags_list = json.loads(tags_data)
-                product.tags.clear()  # نمسح العلاقات القديمة
-                for tag_name in tags_list:
-                    tag, created = Tag.objects.get_or_create(name=tag_name.strip())
-                    product.tags.add(tag)
+                # بنطبق الفرق بس بدل ما نمسح كل العلاقات ونضيفها تاني
+                sync_tags(product, json.loads(tags_data))
             except json.JSONDecodeError:
                 print("Error decoding tags JSON in Update")
 
-    product.save()
+    # update_fields: بنكتب اللي البائع عدله بس، فالـ save ما يرجعش إحصائيات
+    # التقييم أو المخزون لقيم قديمة لو ريفيو أو طلب حصل في النص
+    product.save(update_fields=changed + ["updatedAt"])
     serializer = ProductSerializer(product, many=False)
     return Response(serializer.data)
 
 
+@api_view(["PATCH"])
+@permission_classes([IsAuthenticated])
+def bulkUpdateProducts(request):
+    # تعديل السعر والمخزون لمنتجات كتير في request واحد
+    items = request.data
+    if not isinstance(items, list) or not items:
+        return Response(
+            {"detail": "Send a list of {id, price, discount_price, countInStock}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(items) > settings.BULK_UPDATE_MAX_ITEMS:
+        return Response(
+            {"detail": f"At most {settings.BULK_UPDATE_MAX_ITEMS} items per request"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = []
+    changes = {}
+    for item in items:
+        serializer = ProductPriceStockSerializer(data=item)
+        if not serializer.is_valid():
+            item_id = item.get("id") if isinstance(item, dict) else None
+            results.append({"id": item_id, "status": "invalid", "errors": serializer.errors})
+        elif serializer.validated_data["id"] in changes:
+            results.append(
+                {"id": serializer.validated_data["id"], "status": "duplicate"}
+            )
+        else:
+            changes[serializer.validated_data["id"]] = serializer.validated_data
+            results.append({"id": serializer.validated_data["id"], "status": None})
+
+    # الملكية بتتشيك للـ batch كلها في query واحد
+    fields = ["price", "discount_price", "countInStock"]
+    products = Product.objects.only("id", "user_id", *fields).in_bulk(list(changes))
+    now = timezone.now()
+    updated = []
+    for result in results:
+        if result["status"] is not None:
+            continue
+        product = products.get(result["id"])
+        if product is None:
+            result["status"] = "not_found"
+        elif product.user_id != request.user.id and not request.user.is_staff:
+            result["status"] = "not_authorized"
+        else:
+            for field, value in changes[product.id].items():
+                setattr(product, field, value)
+            product.updatedAt = now
+            updated.append(product)
+            result["status"] = "updated"
+
+    if updated:
+        with transaction.atomic():
+            Product.objects.bulk_update(updated, fields + ["updatedAt"], batch_size=500)
+        # bulk_update مش بيشغل signals: الكاش بيتمسح مرة واحدة للـ batch كلها
+        invalidate_product_details([product.id for product in updated])
+        bump_catalog_version()
+        suggestions.catalog_changed()
+
+    return Response({"updated": len(updated), "results": results})
+
+
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def deleteProduct(request, pk):
@@ -222,76 +401,138 @@ def deleteProduct(request, pk):
         return Response({"detail": "Product not found"}, status=404)
 
 
+class CheckoutError(Exception):
+    def __init__(self, detail, products):
+        super().__init__(detail)
+        self.detail = detail
+        self.products = products
+
+
+def _order_quantities(orderItems):
+    # نفس المنتج ممكن ييجي في أكتر من سطر: بنجمع الكميات
+    quantities = {}
+    for i in orderItems:
+        product_id, qty = int(i["id"]), int(i["qty"])
+        if qty < 1:
+            raise ValueError("qty must be at least 1")
+        quantities[product_id] = quantities.get(product_id, 0) + qty
+    return quantities
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@idempotent
 def addOrderItems(request):
     user = request.user
     data = request.data
-    orderItems = data["orderItems"]
+    orderItems = data.get("orderItems")
 
-    if orderItems and len(orderItems) == 0:
+    if not orderItems:
         return Response(
             {"detail": "No Order Items"}, status=status.HTTP_400_BAD_REQUEST
         )
-    else:
-        # 1. إنشاء الطلب مبدئياً
-        order = Order.objects.create(
-            user=user,
-            paymentMethod=data["paymentMethod"],
-            taxPrice=data["taxPrice"],
-            shippingPrice=data["shippingPrice"],
-            totalPrice=0,  # 👈 هنحسبه تحت بدقة
-        )
 
-        ShippingAddress.objects.create(
-            order=order,
-            address=data["shippingAddress"]["address"],
-            city=data["shippingAddress"]["city"],
-            postalCode=data["shippingAddress"]["postalCode"],
-            country=data["shippingAddress"]["country"],
+    try:
+        quantities = _order_quantities(orderItems)
+    except (KeyError, TypeError, ValueError):
+        return Response(
+            {"detail": "Invalid order items"}, status=status.HTTP_400_BAD_REQUEST
         )
 
-        # متغير لحساب مجموع أسعار المنتجات الفعلي
-        calculated_items_price = 0
-
-        # 2. إنشاء العناصر وحساب السعر
-        for i in orderItems:
-            product = Product.objects.get(id=i["id"])
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            # 1. خصم المخزون الأول: UPDATE مشروط لكل منتج (countInStock >= qty)
+            # فمفيش طلبين يقدروا يبيعوا نفس القطعة، والمخزون عمره ما يبقى بالسالب.
+            # بالترتيب حسب الـ id: كل الطلبات بتقفل الصفوف بنفس الترتيب فمفيش deadlock
+            short = [
+                product_id
+                for product_id, qty in sorted(quantities.items())
+                if not Product.objects.filter(id=product_id, countInStock__gte=qty).update(
+                    countInStock=F("countInStock") - qty, updatedAt=now
+                )
+            ]
 
-            # تحديد السعر: لو فيه خصم خده، مفيش خد الأصلي
-            final_price = (
-                product.discount_price
-                if (product.discount_price and product.discount_price > 0)
-                else product.price
+            # 2. كل المنتجات في query واحد
+            products = Product.objects.only(
+                "id", "name", "price", "discount_price", "image", "countInStock", "category", "user"
+            ).in_bulk(list(quantities))
+            missing = [product_id for product_id in quantities if product_id not in products]
+            if missing:
+                raise CheckoutError("Product not found", [{"id": pk} for pk in missing])
+            if short:
+                # الـ rollback بيرجع أي خصم حصل للسطور التانية
+                raise CheckoutError(
+                    "Not enough stock",
+                    [
+                        {
+                            "id": pk,
+                            "name": products[pk].name,
+                            "countInStock": products[pk].countInStock,
+                            "requested": quantities[pk],
+                        }
+                        for pk in short
+                    ],
+                )
+
+            # 3. إنشاء الطلب والعناصر مرة واحدة
+            items = []
+            calculated_items_price = 0
+            for product_id, qty in quantities.items():
+                product = products[product_id]
+                # تحديد السعر: لو فيه خصم خده، مفيش خد الأصلي
+                final_price = (
+                    product.discount_price
+                    if (product.discount_price and product.discount_price > 0)
+                    else product.price
+                )
+                calculated_items_price += final_price * qty
+                items.append(
+                    OrderItem(
+                        product=product,
+                        name=product.name,
+                        qty=qty,
+                        price=final_price,  # تخزين سعر الشراء الفعلي في العنصر
+                        image=product.image.url if product.image else None,
+                        category_id=product.category_id,
+                        vendor_id=product.user_id,
+                    )
+                )
+
+            # السعر الكلي = مجموع المنتجات + الشحن + الضريبة
+            order = Order.objects.create(
+                user=user,
+                paymentMethod=data["paymentMethod"],
+                taxPrice=data["taxPrice"],
+                shippingPrice=data["shippingPrice"],
+                totalPrice=float(calculated_items_price)
+                + float(data["shippingPrice"])
+                + float(data["taxPrice"]),
             )
-
-            # تجميع السعر الكلي (سعر القطعة * الكمية)
-            calculated_items_price += final_price * i["qty"]
-
-            item = OrderItem.objects.create(
-                product=product,
+            ShippingAddress.objects.create(
                 order=order,
-                name=product.name,
-                qty=i["qty"],
-                price=final_price,  # تخزين سعر الشراء الفعلي في العنصر
-                image=product.image.url,
+                address=data["shippingAddress"]["address"],
+                city=data["shippingAddress"]["city"],
+                postalCode=data["shippingAddress"]["postalCode"],
+                country=data["shippingAddress"]["country"],
             )
-
-            product.countInStock -= item.qty
-            product.save()
-
-        # 3. تحديث السعر الكلي للطلب (مجموع المنتجات + الشحن + الضريبة)
-        # بنحول القيم لـ Decimal أو Float عشان الجمع يكون صح
-        total_order_price = (
-            float(calculated_items_price)
-            + float(data["shippingPrice"])
-            + float(data["taxPrice"])
+            for item in items:
+                item.order = order
+            OrderItem.objects.bulk_create(items)
+            # إحصائيات اليوم بتتحدث في نفس الـ transaction
+            rollups.order_created(order)
+    except CheckoutError as e:
+        return Response(
+            {"detail": e.detail, "products": e.products},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        order.totalPrice = total_order_price
-        order.save()
+    # الـ update() مش بيشغل signals: المخزون اتغير فبنمسح الكاش مرة واحدة
+    invalidate_product_details(list(quantities))
+    bump_catalog_version()
+    suggestions.catalog_changed()
 
-        return Response({"id": order.id}, status=status.HTTP_201_CREATED)
+    return Response({"id": order.id}, status=status.HTTP_201_CREATED)
 
 
 @api_view(["GET"])
@@ -323,57 +564,185 @@ def getOrderById(request, pk):
 
 @api_view(["PUT"])
 @permission_classes([IsAuthenticated])
+@idempotent
 def updateOrderToPaid(request, pk):
     try:
-        order = Order.objects.get(id=pk)
-
-        order.isPaid = True
-        order.paidAt = datetime.now()
-        order.save()
+        with transaction.atomic():
+            order = Order.objects.select_for_update().get(id=pk)
+            # الطلب الملغي مش بيتدفع
+            if order.status == rollups.CANCELLED:
+                return Response(
+                    {"detail": "Cancelled orders cannot be paid"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            # UPDATE مشروط: الدفع يتحسب في الإحصائيات مرة واحدة حتى لو الطلب اتبعت مرتين
+            if (
+                Order.objects.filter(id=order.id, isPaid=False)
+                .exclude(status=rollups.CANCELLED)
+                .update(isPaid=True, paidAt=timezone.now())
+            ):
+                rollups.order_paid(order)
 
         return Response("Order was paid")
     except Order.DoesNotExist:
         return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
+ORDER_ORDERINGS = {
+    "newest": ("-createdAt", "-id"),
+    "oldest": ("createdAt", "id"),
+    "total_desc": ("-totalPrice", "-id"),
+    "total_asc": ("totalPrice", "id"),
+}
+
+
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def getOrders(request):
-    orders = Order.objects.all()
-    serializer = OrderSerializer(orders, many=True)
-    return Response(serializer.data)
+    params = request.query_params
+    orders = OrderSerializer.setup_eager_loading(Order.objects.all())
+
+    try:
+        orders = filter_orders(orders, params)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    ordering = ORDER_ORDERINGS.get(params.get("sort") or "newest")
+    if ordering is None:
+        return Response(
+            {"detail": "sort must be one of: " + ", ".join(ORDER_ORDERINGS)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        rows, next_url, prev_url = paginate_by_cursor(request, orders, ordering=ordering)
+    except InvalidCursor as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = OrderSerializer(rows, many=True)
+    return Response({"orders": serializer.data, "next": next_url, "previous": prev_url})
 
 
 @api_view(["PUT"])
 @permission_classes([IsAdminUser])
 def updateOrderToDelivered(request, pk):
-    print("📢 Deliver Request Received for ID:", pk)  # 1. هل الطلب وصل أصلاً؟
+    if not str(pk).isdigit():
+        return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+    outcome, previous = apply_transitions({int(pk): "Delivered"})[int(pk)]
+    if outcome == "not_found":
+        return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+    if outcome == "invalid_transition":
+        return Response(
+            {"detail": f"A {previous} order can't be delivered"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response("Order was delivered")
 
-    try:
-        order = Order.objects.get(id=pk)
 
-        print(
-            "🛑 Before Update - isDelivered:", order.isDelivered
-        )  # 2. حالته قبل التعديل
+@api_view(["PATCH"])
+@permission_classes([IsAdminUser])
+def bulkUpdateOrderStatus(request):
+    # تغيير حالة طلبات كتير مرة واحدة: [{"id": 5, "status": "Shipped"}, ...]
+    items = request.data
+    if not isinstance(items, list) or not items:
+        return Response(
+            {"detail": "Send a list of {id, status}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(items) > settings.BULK_UPDATE_MAX_ITEMS:
+        return Response(
+            {"detail": f"At most {settings.BULK_UPDATE_MAX_ITEMS} items per request"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = []
+    changes = {}
+    for item in items:
+        serializer = OrderStatusSerializer(data=item)
+        if not serializer.is_valid():
+            item_id = item.get("id") if isinstance(item, dict) else None
+            results.append({"id": item_id, "status": "invalid", "errors": serializer.errors})
+        elif serializer.validated_data["id"] in changes:
+            results.append({"id": serializer.validated_data["id"], "status": "duplicate"})
+        else:
+            order_id = serializer.validated_data["id"]
+            changes[order_id] = serializer.validated_data["status"]
+            results.append({"id": order_id, "status": None, "to": changes[order_id]})
 
-        order.isDelivered = True
-        order.deliveredAt = datetime.now()
-        order.save()
+    outcomes = apply_transitions(changes) if changes else {}
+    for result in results:
+        if result["status"] is None:
+            result["status"], result["from"] = outcomes[result["id"]]
 
-        print(
-            "✅ After Save - isDelivered:", order.isDelivered
-        )  # 3. حالته بعد الحفظ (المفروض تبقى True)
+    updated = sum(1 for result in results if result["status"] == "updated")
+    return Response({"updated": updated, "results": results})
 
-        return Response("Order was delivered")
-    except Order.DoesNotExist:
-        print("❌ Order Not Found")
-        return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        print("❌ Error:", e)  # لو فيه خطأ غريب
+
+# views for Product Reviews (صفحات بالـ cursor بدل ما ترجع كلها مع المنتج)
+REVIEW_ORDERINGS = {
+    "newest": ("-createdAt", "-id"),
+    "highest": ("-rating", "-createdAt", "-id"),
+    "lowest": ("rating", "-createdAt", "-id"),
+}
+
+
+@api_view(["GET"])
+def getProductReviews(request, pk):
+    stars = ["stars1", "stars2", "stars3", "stars4", "stars5"]
+    product = (
+        Product.objects.only("id", *stars).filter(id=pk).first()
+        if str(pk).isdigit()
+        else None
+    )
+    if product is None:
         return Response(
-            {"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {"detail": "Product not found"}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    ordering = REVIEW_ORDERINGS.get(request.query_params.get("sort") or "newest")
+    if ordering is None:
+        return Response(
+            {"detail": "sort must be one of: " + ", ".join(REVIEW_ORDERINGS)},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
+    reviews = Review.objects.filter(product_id=product.id).select_related("user")
+    # ?rating=5 أو ?rating=4,5
+    ratings_filter = [
+        int(r)
+        for r in (request.query_params.get("rating") or "").split(",")
+        if r.strip() in ("1", "2", "3", "4", "5")
+    ]
+    if ratings_filter:
+        reviews = reviews.filter(rating__in=ratings_filter)
+    # ?mine=1: ريفيو المستخدم الحالي (الفرونت بيحتاجه لزرار التعديل)
+    if request.query_params.get("mine"):
+        reviews = reviews.filter(user_id=request.user.id)
+
+    try:
+        rows, next_url, prev_url = paginate_by_cursor(request, reviews, ordering=ordering)
+    except InvalidCursor as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(
+        {
+            "reviews": ReviewSerializer(rows, many=True).data,
+            "rating_histogram": rating_histogram(product),
+            "next": next_url,
+            "previous": prev_url,
+        }
+    )
+
+
+def _review_rating(data):
+    # التقييم لازم يكون رقم صحيح من 1 لـ 5 (الـ histogram فيه عداد لكل نجمة)
+    value = data.get("rating")
+    if isinstance(value, bool):
+        return None
+    try:
+        rating = int(str(value).strip())  # "4.5" و 4.5 بيترفضوا بدل ما يتقصوا لـ 4
+    except (TypeError, ValueError):
+        return None
+    return rating if rating in ratings.STARS else None
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -392,7 +761,7 @@ def createProductReview(request, pk):
         )
 
     # 2. التحقق من وجود التقييم
-    elif data.get("rating") == 0 or data.get("rating") is None:
+    elif _review_rating(data) is None:
         return Response(
             {"detail": "Please select a rating"}, status=status.HTTP_400_BAD_REQUEST
         )
@@ -400,26 +769,17 @@ def createProductReview(request, pk):
     # 3. إنشاء المراجعة
     else:
         try:
-            review = Review.objects.create(
-                user=user,
-                product=product,
-                name=user.first_name if user.first_name else user.username,
-                rating=int(data["rating"]),
-                comment=data["comment"],
-            )
-
-            # 4. تحديث الإحصائيات
-            # 👇👇 التعديل الثاني: استخدمنا reviews.all() بدل review_set.all()
-            reviews = product.reviews.all()
-
-            product.numReviews = len(reviews)
-
-            total = 0
-            for i in reviews:
-                total += i.rating
-
-            product.rating = total / len(reviews)
-            product.save()
+            with transaction.atomic():
+                review = Review.objects.create(
+                    user=user,
+                    product=product,
+                    name=user.first_name if user.first_name else user.username,
+                    rating=_review_rating(data),
+                    comment=data["comment"],
+                )
+
+                # 4. تحديث الإحصائيات: UPDATE واحد بالـ F() بدل ما نلف على كل الريفيوهات
+                ratings.review_added(product.id, review.rating)
 
             return Response("Review Added")
 
@@ -439,27 +799,23 @@ def updateProductReview(request, pk):
     data = request.data
 
     try:
-        # 1. بنجيب الريفيو القديم بتاع نفس المستخدم للمنتج ده
-        review = product.reviews.get(user=user)
-
-        # 2. تحديث البيانات
-        if data.get("rating") == 0:
+        # 1. التحقق من التقييم
+        if _review_rating(data) is None:
             return Response(
                 {"detail": "Please select a rating"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        review.rating = int(data["rating"])
-        review.comment = data["comment"]
-        review.save()
-
-        # 3. إعادة حساب متوسط التقييم (عشان لو غير النجوم، التقييم الكلي يتغير)
-        reviews = product.reviews.all()
-        total = 0
-        for i in reviews:
-            total += i.rating
+        with transaction.atomic():
+            # 2. بنجيب الريفيو القديم جوه الـ transaction وبنقفله: تعديلين في نفس
+            # الوقت ما يطرحوش نفس النجمة القديمة مرتين
+            review = product.reviews.select_for_update().get(user=user)
+            old_rating = review.rating
+            review.rating = _review_rating(data)
+            review.comment = data["comment"]
+            review.save()
 
-        product.rating = total / len(reviews)
-        product.save()
+            # 3. تحديث متوسط التقييم (عشان لو غير النجوم، التقييم الكلي يتغير)
+            ratings.review_changed(product.id, old_rating, review.rating)
 
         return Response("Review Updated")
 
@@ -470,12 +826,19 @@ def updateProductReview(request, pk):
 
 
 @api_view(["GET"])
+@cache_catalog_response
 def getTopProducts(request):
-    # التعديل: شلنا الـ filter خالص
-    # كدة بنقوله: رتب كل المنتجات حسب التقييم تنازلياً، وهات أول 5
-    # سواء بقى واخدين 5 نجوم أو حتى نجمة واحدة، المهم دول الأعلى حالياً
-    products = Product.objects.all().order_by("-rating")[0:5]
-    serializer = ProductSerializer(products, many=True)
+    # الترتيب محسوب مسبقاً في ProductRanking (Bayesian score)
+    # ?limit= لعدد المنتجات و ?category= لترتيب قسم معين
+    limit = get_page_size(request, settings.LEADERBOARD["SIZE"], param="limit")
+    ids = top_product_ids(limit, request.query_params.get("category"))
+
+    fields = requested_product_fields(request)
+    products = ProductSerializer.setup_eager_loading(
+        Product.objects.filter(id__in=ids), fields=fields
+    ).in_bulk()
+    products = [products[i] for i in ids if i in products]
+    serializer = ProductSerializer(products, many=True, fields=fields)
     return Response(serializer.data)
 
 
@@ -483,7 +846,9 @@ def getTopProducts(request):
 @permission_classes([IsAuthenticated])
 def getMyOrders(request):
     user = request.user
-    orders = Order.objects.filter(user=user).order_by("-createdAt")
+    orders = OrderSerializer.setup_eager_loading(
+        Order.objects.filter(user=user).order_by("-createdAt")
+    )
     serializer = OrderSerializer(orders, many=True)
     return Response(serializer.data)
 
@@ -492,8 +857,11 @@ def getMyOrders(request):
 @permission_classes([IsAdminUser])
 def deleteOrder(request, pk):
     try:
-        order = Order.objects.get(id=pk)  # أو _id حسب الموديل بتاعك
-        order.delete()
+        with transaction.atomic():
+            # الحالة من جوه الـ transaction: الطلب الملغي مش محسوب في الإحصائيات
+            order = Order.objects.select_for_update().get(id=pk)
+            rollups.order_removed(order)
+            order.delete()
         return Response("Order was deleted")
     except Order.DoesNotExist:
         return Response({"detail": "Order does not exist"}, status=404)
@@ -503,7 +871,9 @@ def deleteOrder(request, pk):
 @permission_classes([IsAuthenticated])
 def getCart(request):
     user = request.user
-    cart_items = CartItem.objects.filter(user=user).order_by("-createdAt")
+    cart_items = CartItemSerializer.setup_eager_loading(
+        CartItem.objects.filter(user=user).order_by("-createdAt")
+    )
     serializer = CartItemSerializer(cart_items, many=True)
     return Response(serializer.data)
 
@@ -557,7 +927,9 @@ def clearCart(request):
 @permission_classes([IsAuthenticated])
 def getWishlist(request):
     user = request.user
-    wishlist = WishlistItem.objects.filter(user=user).order_by("-createdAt")
+    wishlist = WishlistItemSerializer.setup_eager_loading(
+        WishlistItem.objects.filter(user=user).order_by("-createdAt")
+    )
     serializer = WishlistItemSerializer(wishlist, many=True)
     return Response(serializer.data)
 
@@ -571,14 +943,14 @@ def toggleWishlist(request):
     product = Product.objects.get(id=product_id)
 
     # لو موجود امسحه، لو مش موجود ضيفه
-    item = WishlistItem.objects.filter(user=user, product=product)
-
-    if item.exists():
-        item.delete()
+    deleted, _ = WishlistItem.objects.filter(user=user, product=product).delete()
+    if deleted:
         return Response({"status": "removed"})
-    else:
-        WishlistItem.objects.create(user=user, product=product)
-        return Response({"status": "added"})
+
+    # get_or_create (زي addToCart): لو ضغطتين وصلوا مع بعض، التانية بتلاقي
+    # الصف اللي الأولى عملته بدل IntegrityError
+    WishlistItem.objects.get_or_create(user=user, product=product)
+    return Response({"status": "added"})
 
 
 @api_view(["DELETE"])
@@ -606,31 +978,45 @@ def deleteProductImage(request, pk):
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def getDashboardStats(request):
-    total_sales = Order.objects.aggregate(sum=Sum("totalPrice"))["sum"] or 0
-    total_orders = Order.objects.count()
-    total_products = Product.objects.count()
-    total_users = User.objects.count()
-
-    # تحسين داتا الشارت (آخر 7 طلبات أو آخر 7 أيام)
-    # بنرجع التاريخ والسعر فقط
-    recent_orders = Order.objects.all().order_by("-createdAt")[:10]
-    # بنعكس الترتيب عشان الشارت يبدأ من القديم للجديد
-    orders_data = [
-        {"name": o.createdAt.strftime("%d/%m"), "sales": o.totalPrice}
-        for o in reversed(recent_orders)
-    ]
+    # المبيعات والطلبات من جداول الـ rollup اليومية (store/rollups.py):
+    # الشغل على قد عدد الأيام مش عدد الطلبات
+    config = settings.DASHBOARD
+    try:
+        days = int(request.query_params.get("days") or config["DEFAULT_WINDOW"])
+    except ValueError:
+        days = None
+    if days not in config["WINDOWS"]:
+        return Response(
+            {"detail": "days must be one of: " + ", ".join(map(str, config["WINDOWS"]))},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    totals = rollups.totals()
+    chart = rollups.daily_series(days)
 
     return Response(
         {
-            "totalSales": total_sales,
-            "totalOrders": total_orders,
-            "totalProducts": total_products,
-            "totalUsers": total_users,
-            "salesChart": orders_data,  # الداتا الجديدة للشارت
+            "totalSales": totals["sales"],
+            "totalOrders": totals["orders"],
+            "totalItems": totals["items"],
+            "totalProducts": Product.objects.count(),
+            "totalUsers": User.objects.count(),
+            "days": days,
+            "windowSales": sum(point["sales"] for point in chart),
+            "windowOrders": sum(point["orders"] for point in chart),
+            "salesChart": chart,  # نقطة لكل يوم من القديم للجديد
+            "topCategories": rollups.top_categories(days, config["TOP"]),
+            "topVendors": rollups.top_vendors(days, config["TOP"]),
         }
     )
 
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def getCacheStats(request):
+    return Response({"productDetail": product_detail_stats()})
+
+
 # -------------------------
 # 2. Category Management (Admin)
 # -------------------------
@@ -677,62 +1063,100 @@ def deleteCategory(request, pk):
         )
 
 
+def _export_orders(request, fmt):
+    # ?items=1 سطر لكل منتج في الطلب بدل سطر لكل طلب، ونفس فلاتر قائمة الطلبات
+    params = request.query_params
+    per_item = parse_bool(params.get("items")) or False
+    try:
+        if per_item:
+            queryset = filter_orders(OrderItem.objects.all(), params, prefix="order__")
+            rows, columns = exporters.item_rows(queryset)
+        else:
+            rows, columns = exporters.order_rows(filter_orders(Order.objects.all(), params))
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # StreamingHttpResponse: الملف بيتبعت وهو بيتكتب، من غير ما يتبني كله في الذاكرة
+    content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(
+        exporters.stream(rows, columns, fmt), content_type=content_type
+    )
+    filename = "order_items_report" if per_item else "orders_report"
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def exportOrdersCSV(request):
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="orders_report.csv"'
+    return _export_orders(request, "csv")
 
-    writer = csv.writer(response)
-    # عناوين الأعمدة
-    writer.writerow(
-        ["Order ID", "Customer", "Date", "Total Price", "Paid?", "Delivered?"]
-    )
 
-    orders = Order.objects.all().order_by("-createdAt")
-    for order in orders:
-        writer.writerow(
-            [
-                order._id if hasattr(order, "_id") else order.id,
-                order.user.first_name if order.user else "Guest",
-                order.createdAt.strftime("%Y-%m-%d"),
-                order.totalPrice,
-                "Yes" if order.isPaid else "No",
-                "Yes" if order.isDelivered else "No",
-            ]
-        )
-
-    return response
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def exportOrdersJSONL(request):
+    return _export_orders(request, "jsonl")
 
 
 # أضف هذا الكود في نهاية ملف views.py
 
 
 @api_view(["GET"])
+@cache_catalog_response
 def getProductsByCategory(request):
-    categories = Category.objects.all()
-    data = []
-
-    for cat in categories:
-        # هنجيب المنتجات الخاصة بالقسم ده (الموافق عليها فقط)
-        products = Product.objects.filter(
-            category=cat, approval_status="approved"
-        ).order_by("-createdAt")
+    # أحدث N منتج من كل قسم في query واحدة (ROW_NUMBER لكل قسم)
+    # بدل ما نرجع المتجر كله، وباقي القسم بيتحمل من لينك "more"
+    limit = get_page_size(request, settings.SHOP_VIEW_LIMIT, param="limit")
+    fields = requested_product_fields(request)
+    newest_first = [F("createdAt").desc(), F("id").desc()]
+
+    products = ProductSerializer.setup_eager_loading(
+        Product.objects.filter(category__isnull=False, approval_status="approved")
+        .annotate(
+            shop_category_name=F("category__name"),
+            category_rank=Window(
+                RowNumber(), partition_by=F("category"), order_by=newest_first
+            ),
+            category_total=Window(Count("id"), partition_by=F("category")),
+        )
+        .filter(category_rank__lte=limit)
+        .order_by("category_id", "category_rank"),
+        fields=fields,
+    )
 
-        # لو القسم فيه منتجات، ضيفه للقائمة
-        if products.exists():
-            serializer = ProductSerializer(products, many=True)
-            data.append({"id": cat.id, "name": cat.name, "products": serializer.data})
+    data = []
+    # store.urls متضمنة مرتين (/api/ ومن غير prefix)، فـ reverse() بيرجع النسخة
+    # اللي من غير /api/. بنبني لينك قائمة المنتجات من نفس الـ path اللي اتطلب
+    products_url = request.build_absolute_uri(request.path.removesuffix("shop-view/"))
+    for category_id, group in groupby(products, key=attrgetter("category_id")):
+        group = list(group)
+        last = group[-1]
+        more = None
+        if last.category_total > len(group):
+            cursor = encode_cursor([last.createdAt, last.id], "next")
+            more = f"{products_url}?{urlencode({'category': category_id, 'cursor': cursor})}"
+
+        serializer = ProductSerializer(group, many=True, fields=fields)
+        data.append(
+            {
+                "id": category_id,
+                "name": last.shop_category_name,
+                "total": last.category_total,
+                "products": serializer.data,
+                "more": more,
+            }
+        )
 
     return Response(data)
 
 
-
-
 # -------------------------
 # 3. Tag Management (Admin)
 # -------------------------
 @api_view(["GET"])
+@cache_control_headers(public=True, no_cache=True)
+@condition(etag_func=lambda request: f'"tags-{get_version("tags")}"')
+@cache_catalog_response
 def getTags(request):
     tags = Tag.objects.all()
     # تأكد أن TagSerializer موجود في serializers.py
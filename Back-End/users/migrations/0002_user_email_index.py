@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 16:45
+
+from django.conf import settings
+from django.db import migrations
+
+# registerUser و forgot_password بيدوروا على اليوزر بالإيميل
+# (auth_user مش موديل عندنا، فالـ index بيتعمل بـ SQL مباشر)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX users_auth_user_email_idx ON auth_user (email)",
+            "DROP INDEX users_auth_user_email_idx",
+        ),
+    ]
@@ -14,6 +14,7 @@ urlpatterns = [
     # رابط التفعيل (التعديل: ضفنا users/ في الأول)
     path('activate/<str:uid>/<str:token>/', views.activateUser, name='activate'),
     path('seller/orders/', views.getSellerOrders, name='seller-orders'),
+    path('seller/analytics/', views.getSellerAnalytics, name='seller-analytics'),
 
     # 3. روابط الأدمن العامة
     path('', views.getUsers, name='users'),
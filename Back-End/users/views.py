@@ -24,6 +24,19 @@ from django.utils.encoding import force_bytes, force_str
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from collections import defaultdict
+from store.analytics import vendor_analytics
+from store.orders import filter_orders
+from store.pagination import paginate_by_cursor
+
+
+def _line_total(prefix=""):
+    # قيمة السطر (السعر × الكمية) محسوبة في الداتابيز
+    return ExpressionWrapper(
+        F(prefix + "price") * F(prefix + "qty"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
 
 
 # استخدام السيرياليزر المخصص للتوكن
@@ -298,36 +311,83 @@ def reset_password(request, uid, token):
         )
 
 
-# تأكد إنك مستدعي OrderItem فوق
-from store.models import Order, OrderItem
-
-
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def getSellerOrders(request):
     user = request.user
-    if user.profile.type == "vendor":
-        items = OrderItem.objects.filter(product__user=user).order_by("-id")
-
-        custom_orders = []
-        for item in items:
-            custom_orders.append(
-                {
-                    "_id": item.id,
-                    "order_id": item.order.id,  # 👈 التعديل هنا: استخدمنا id بدل _id
-                    "name": item.name,
-                    "qty": item.qty,
-                    "price": item.price,
-                    "totalPrice": item.price * item.qty,
-                    "createdAt": item.order.createdAt,
-                    "isPaid": item.order.isPaid,
-                    "isDelivered": item.order.isDelivered,
-                }
-            )
+    if user.profile.type != "vendor":
+        return Response(
+            {"detail": "Not authorized as a vendor"},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    # الطلبات اللي فيها منتجات البائع، مجمعة بالطلب: الكمية والإجمالي (نصيبه بس)
+    # محسوبين في SQL، وصفحات بالـ cursor بنفس فلاتر قائمة الطلبات
+    try:
+        orders = filter_orders(
+            Order.objects.filter(items__product__user=user), request.query_params
+        )
+        orders = orders.only(
+            "id", "createdAt", "status", "isPaid", "isDelivered"
+        ).annotate(vendor_qty=Sum("items__qty"), vendor_total=Sum(_line_total("items__")))
+        rows, next_url, prev_url = paginate_by_cursor(request, orders)
+    except ValueError as e:  # تاريخ غلط أو InvalidCursor
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # سطور البائع بس في طلبات الصفحة دي، في query واحد
+    items = defaultdict(list)
+    for item in (
+        OrderItem.objects.filter(order__in=[order.id for order in rows], product__user=user)
+        .annotate(line_total=_line_total())
+        .order_by("order_id", "id")
+        .values("id", "order_id", "product_id", "name", "qty", "price", "line_total")
+    ):
+        items[item["order_id"]].append(
+            {
+                "_id": item["id"],
+                "product": item["product_id"],
+                "name": item["name"],
+                "qty": item["qty"],
+                "price": item["price"],
+                "totalPrice": item["line_total"],
+            }
+        )
 
-        return Response(custom_orders)
-    else:
+    seller_orders = [
+        {
+            "order_id": order.id,
+            "createdAt": order.createdAt,
+            "status": order.status,
+            "isPaid": order.isPaid,
+            "isDelivered": order.isDelivered,
+            "qty": order.vendor_qty,
+            "totalPrice": order.vendor_total,
+            "items": items[order.id],
+        }
+        for order in rows
+    ]
+    return Response({"orders": seller_orders, "next": next_url, "previous": prev_url})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def getSellerAnalytics(request):
+    user = request.user
+    if user.profile.type != "vendor":
         return Response(
             {"detail": "Not authorized as a vendor"},
             status=status.HTTP_401_UNAUTHORIZED,
         )
+
+    # نفس فترات الداشبورد: ?days=7 / 30 / 365
+    windows = settings.DASHBOARD["WINDOWS"]
+    try:
+        days = int(request.query_params.get("days") or 30)
+    except ValueError:
+        days = None
+    if days not in windows:
+        return Response(
+            {"detail": "days must be one of: " + ", ".join(map(str, windows))},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(vendor_analytics(user.id, days))
@@ -38,6 +38,7 @@ export const ENDPOINTS = {
   REGISTER: "api/users/register/",
   PROFILE_UPDATE: "api/users/profile/update/",
   SELLER_ORDERS: "api/users/seller/orders/",
+  SELLER_ANALYTICS: "api/users/seller/analytics/",
   MY_ORDERS: "api/orders/myorders/",
   CART: "api/cart/",
   WISHLIST: "api/wishlist/",
@@ -79,7 +80,7 @@ export const apiService = {
   deleteOrder: (id) => api.delete(ENDPOINTS.DELETE_ORDER(id)),
 
 
-  getDashboardStats: () => api.get(ENDPOINTS.DASHBOARD_STATS),
+  getDashboardStats: (days) => api.get(ENDPOINTS.DASHBOARD_STATS, { params: { days } }),
   createCategory: (data) => api.post(ENDPOINTS.CREATE_CATEGORY, data),
   updateCategory: (id, data) => api.put(ENDPOINTS.UPDATE_CATEGORY(id), data),
   deleteCategory: (id) => api.delete(ENDPOINTS.DELETE_CATEGORY(id)),
@@ -12,7 +12,7 @@ const ProductCarousel = () => {
     useEffect(() => {
         const fetchTopProducts = async () => {
             try {
-                const { data } = await api.get(ENDPOINTS.TOP_PRODUCTS);
+                const { data } = await api.get(`${ENDPOINTS.TOP_PRODUCTS}?expand=description`);
                 setProducts(data.slice(0, 5)); // الاكتفاء بأفضل 5 لتقليل حجم الـ DOM
                 setLoading(false);
             } catch (error) {
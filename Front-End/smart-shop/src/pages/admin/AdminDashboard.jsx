@@ -10,6 +10,7 @@ const AdminDashboard = () => {
     const [tags, setTags] = useState([]); // 👈 state للتاجز
     const [loading, setLoading] = useState(true);
     const [chartReady, setChartReady] = useState(false);
+    const [days, setDays] = useState(7); // فترة الشارت: 7 / 30 / 365 يوم
     
     // --- UI State ---
     const [activeTab, setActiveTab] = useState('categories'); // 👈 للتحكم في التبويبات (categories أو tags)
@@ -24,7 +25,7 @@ const AdminDashboard = () => {
     // 1. جلب البيانات
     const fetchData = async () => {
         try {
-            const statsData = await apiService.getDashboardStats();
+            const statsData = await apiService.getDashboardStats(days);
             const catsData = await apiService.getCategories();
             // نفترض أن هناك API لجلب التاجز، لو مش موجود ممكن تستخدم نفس منطق الأقسام مؤقتاً
             // const tagsData = await apiService.getTags(); 
@@ -56,6 +57,16 @@ const AdminDashboard = () => {
         fetchData();
     }, []);
 
+    const changeWindow = async (value) => {
+        setDays(value);
+        try {
+            const { data } = await apiService.getDashboardStats(value);
+            setStats(data);
+        } catch (error) {
+            console.error("Error fetching stats", error);
+        }
+    };
+
     // --- Category Handlers ---
     const handleCategorySubmit = async (e) => {
         e.preventDefault();
@@ -192,7 +203,20 @@ const AdminDashboard = () => {
                 
                 {/* 2. Sales Analytics Chart */}
                 <div className="bg-white dark:bg-dark-accent p-4 md:p-6 rounded-3xl shadow-lg border border-gray-100 dark:border-white/5 order-2 lg:order-1 min-w-0">
-                    <h2 className="text-lg md:text-2xl font-bold text-gray-800 dark:text-white mb-4 md:mb-6">Sales Performance</h2>
+                    <div className="flex justify-between items-center gap-3 mb-4 md:mb-6">
+                        <h2 className="text-lg md:text-2xl font-bold text-gray-800 dark:text-white">Sales Performance</h2>
+                        <div className="flex gap-1 bg-gray-50 dark:bg-white/5 p-1 rounded-xl">
+                            {[7, 30, 365].map((value) => (
+                                <button
+                                    key={value}
+                                    onClick={() => changeWindow(value)}
+                                    className={`px-3 py-1 rounded-lg text-xs font-bold transition ${days === value ? 'bg-primary text-white' : 'text-gray-500 hover:text-gray-800 dark:hover:text-white'}`}
+                                >
+                                    {value === 365 ? '1Y' : `${value}D`}
+                                </button>
+                            ))}
+                        </div>
+                    </div>
                     
                     <div style={{ width: '100%', height: '300px' }}>
                         {chartReady && stats?.salesChart && stats.salesChart.length > 0 ? (
@@ -7,7 +7,9 @@ import { useSettings } from '../../context/SettingsContext';
 
 const OrderListScreen = () => {
     const [orders, setOrders] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const navigate = useNavigate();
     const { t } = useSettings();
 
@@ -15,7 +17,8 @@ const OrderListScreen = () => {
         const fetchOrders = async () => {
             try {
                 const { data } = await api.get(ENDPOINTS.ORDERS_LIST);
-                setOrders(data);
+                setOrders(data.orders);
+                setNextPage(data.next);
                 setLoading(false);
             } catch (error) {
                 console.error(error);
@@ -25,6 +28,19 @@ const OrderListScreen = () => {
         fetchOrders();
     }, []);
 
+    // الطلبات بتيجي صفحات (cursor)، والـ next هو لينك الصفحة اللي بعدها
+    const loadMoreHandler = async () => {
+        setLoadingMore(true);
+        try {
+            const { data } = await api.get(nextPage);
+            setOrders((prev) => [...prev, ...data.orders]);
+            setNextPage(data.next);
+        } catch (error) {
+            console.error(error);
+        }
+        setLoadingMore(false);
+    };
+
     const deleteHandler = async (id) => {
         if (window.confirm(t('confirmDeleteOrder') || 'Are you sure you want to delete this order?')) {
             try {
@@ -124,6 +140,14 @@ const OrderListScreen = () => {
                                 </tbody>
                             </table>
                         </div>
+
+                        {nextPage && (
+                            <div className="text-center mt-8">
+                                <button onClick={loadMoreHandler} disabled={loadingMore} className="bg-primary text-white px-8 py-3 rounded-2xl font-bold text-sm uppercase transition hover:opacity-90 disabled:opacity-50">
+                                    {loadingMore ? 'Loading...' : (t('loadMore') || 'Load More')}
+                                </button>
+                            </div>
+                        )}
                     </>
                 )}
             </div>
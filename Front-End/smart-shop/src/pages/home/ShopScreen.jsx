@@ -22,6 +22,23 @@ const ShopScreen = () => {
         fetchShopData();
     }, []);
 
+    // "View all": باقي منتجات القسم من لينك "more" (cursor)، ولو لسه فيه تاني بنشيل "next"
+    const loadMore = async (e, category) => {
+        e.preventDefault();
+        try {
+            const { data } = await api.get(category.more);
+            setShopData((sections) =>
+                sections.map((section) =>
+                    section.id === category.id
+                        ? { ...section, products: [...section.products, ...data.products], more: data.next }
+                        : section
+                )
+            );
+        } catch (error) {
+            console.error("Error fetching category products", error);
+        }
+    };
+
     if (loading) {
         return (
             <div className="min-h-screen pt-24 flex justify-center items-start">
@@ -59,6 +76,15 @@ const ShopScreen = () => {
                                 {category.name}
                             </h2>
                             <div className="h-[1px] flex-1 bg-gray-200 dark:bg-white/10"></div>
+                            {category.more && (
+                                <a
+                                    href={category.more}
+                                    onClick={(e) => loadMore(e, category)}
+                                    className="text-sm font-bold text-primary hover:underline whitespace-nowrap"
+                                >
+                                    View all ({category.total})
+                                </a>
+                            )}
                         </div>
 
                         {/* Products Grid */}
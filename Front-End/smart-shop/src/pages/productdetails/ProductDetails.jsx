@@ -28,6 +28,8 @@ const ProductDetails = () => {
     const [comment, setComment] = useState('');
     const [reviewLoading, setReviewLoading] = useState(false);
     const [isEditing, setIsEditing] = useState(false);
+    // ريفيو المستخدم نفسه (المنتج بيرجع آخر كام ريفيو بس)
+    const [myReview, setMyReview] = useState(null);
 
     const userInfo = JSON.parse(localStorage.getItem('userInfo'));
 
@@ -40,6 +42,11 @@ const ProductDetails = () => {
             setProduct(currentProduct);
             setDisplayImage(currentProduct.image);
 
+            if (userInfo) {
+                const { data: mine } = await api.get(`api/products/${id}/reviews/?mine=1`);
+                setMyReview(mine.reviews[0] || null);
+            }
+
             // 2. جلب المنتجات للمقترحات
             const response = await apiService.getProducts();
 
@@ -99,7 +106,7 @@ const ProductDetails = () => {
     };
 
     // --- Review Logic ---
-    const userReview = product?.reviews.find(r => r.user === userInfo?.id);
+    const userReview = product?.reviews.find(r => r.user === userInfo?.id) || myReview;
 
     const editReviewHandler = () => {
         if (userReview) {
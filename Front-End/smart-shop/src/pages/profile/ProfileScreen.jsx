@@ -26,6 +26,8 @@ const ProfileScreen = () => {
 
   const [myOrders, setMyOrders] = useState([]);
   const [sellerOrders, setSellerOrders] = useState([]);
+  const [sellerNextPage, setSellerNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
 
   const userInfo = JSON.parse(localStorage.getItem('userInfo'));
@@ -65,7 +67,8 @@ const ProfileScreen = () => {
         if (userInfo.profile?.type === 'vendor') {
           try {
             const { data } = await api.get('/api/users/seller/orders/');
-            setSellerOrders(data);
+            setSellerOrders(data.orders);
+            setSellerNextPage(data.next);
           } catch (error) { console.log(error); }
         }
       };
@@ -74,6 +77,17 @@ const ProfileScreen = () => {
     }
   }, [navigate]);
 
+  // طلبات البائع بتيجي صفحات (cursor)، والـ next هو لينك الصفحة اللي بعدها
+  const loadMoreSellerOrders = async () => {
+    setLoadingMore(true);
+    try {
+      const { data } = await api.get(sellerNextPage);
+      setSellerOrders((prev) => [...prev, ...data.orders]);
+      setSellerNextPage(data.next);
+    } catch (error) { console.log(error); }
+    setLoadingMore(false);
+  };
+
   const uploadFileHandler = (e) => {
     const file = e.target.files[0];
     setProfileImage(file);
@@ -242,6 +256,14 @@ const ProfileScreen = () => {
               ) : (
                 <OrdersTable orders={sellerOrders} isSeller={true} navigate={navigate} t={t} isDarkBg={true} />
               )}
+
+              {sellerNextPage && (
+                <div className="text-center mt-6">
+                  <button onClick={loadMoreSellerOrders} disabled={loadingMore} className="px-8 py-3 bg-white text-black rounded-xl font-bold text-sm uppercase transition hover:bg-gray-200 disabled:opacity-50">
+                    {loadingMore ? 'Loading...' : (t('loadMore') || 'Load More')}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -250,6 +272,9 @@ const ProfileScreen = () => {
   );
 };
 
+// طلبات البائع بتيجي مجمعة بالطلب: كل طلب فيه سطور منتجاته بس
+const sellerItemsLabel = (order) => order.items.map((item) => `${item.name} (${item.qty}x)`).join(', ');
+
 const OrdersTable = ({ orders, isSeller, navigate, t, isDarkBg = false }) => {
     return (
         <div className="overflow-hidden">
@@ -265,7 +290,7 @@ const OrdersTable = ({ orders, isSeller, navigate, t, isDarkBg = false }) => {
                             </div>
                             <div className="mb-3">
                                 {isSeller ? (
-                                    <p className={`font-bold ${isDarkBg ? 'text-gray-200' : 'text-gray-700 dark:text-gray-300'}`}>{order.name} <span className="text-xs opacity-70">({order.qty}x)</span></p>
+                                    <p className={`font-bold ${isDarkBg ? 'text-gray-200' : 'text-gray-700 dark:text-gray-300'}`}>{sellerItemsLabel(order)} <span className="text-xs opacity-70">(${order.totalPrice})</span></p>
                                 ) : (
                                     <p className="text-primary font-black">${order.totalPrice}</p>
                                 )}
@@ -307,8 +332,8 @@ const OrdersTable = ({ orders, isSeller, navigate, t, isDarkBg = false }) => {
                                     <td className="p-4">
                                         {isSeller ? (
                                             <div>
-                                                <span className={`block font-bold ${isDarkBg ? 'text-white' : 'text-gray-900 dark:text-white'}`}>{order.name}</span>
-                                                <span className="text-xs opacity-60">{order.qty} x ${order.price}</span>
+                                                <span className={`block font-bold ${isDarkBg ? 'text-white' : 'text-gray-900 dark:text-white'}`}>{sellerItemsLabel(order)}</span>
+                                                <span className="text-xs opacity-60">{order.qty} items · ${order.totalPrice}</span>
                                             </div>
                                         ) : (
                                             <span className="text-primary font-bold">${order.totalPrice}</span>
@@ -7,6 +7,7 @@ import { useSettings } from '../../context/SettingsContext';
 
 const SellerDashboard = () => {
   const [products, setProducts] = useState([]);
+  const [summary, setSummary] = useState(null); // مبيعات آخر 30 يوم محسوبة في الباك
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   
@@ -24,8 +25,18 @@ const SellerDashboard = () => {
     }
   };
 
+  const fetchAnalytics = async () => {
+    try {
+      const { data } = await api.get(ENDPOINTS.SELLER_ANALYTICS, { params: { days: 30 } });
+      setSummary(data.summary);
+    } catch (err) {
+      console.error(err);
+    }
+  };
+
   useEffect(() => {
     fetchMyProducts();
+    fetchAnalytics();
   }, []);
 
   const deleteHandler = async (id) => {
@@ -68,6 +79,22 @@ const SellerDashboard = () => {
             </button>
         </div>
 
+        {summary && (
+            <div className="grid grid-cols-2 md:grid-cols-4 gap-4 mb-10">
+                {[
+                    ['Revenue (30d)', `$${Number(summary.revenue).toFixed(2)}`],
+                    ['Units Sold', summary.units],
+                    ['Orders', summary.orders],
+                    ['Return Rate', summary.returnRate === null ? '—' : `${(summary.returnRate * 100).toFixed(1)}%`],
+                ].map(([label, value]) => (
+                    <div key={label} className="bg-white dark:bg-gray-800 p-5 rounded-3xl border border-gray-100 dark:border-white/5 shadow-sm">
+                        <p className="text-xs font-bold uppercase tracking-wider text-gray-500 dark:text-gray-400">{label}</p>
+                        <p className="text-2xl font-black text-gray-900 dark:text-white mt-1">{value}</p>
+                    </div>
+                ))}
+            </div>
+        )}
+
         {loading ? (
             <div className="flex justify-center items-center py-20 text-primary font-bold animate-pulse">Loading...</div>
         ) : error ? (